@@ -18,9 +18,6 @@ def audio_filter():
     # Normalize audio to b between -1 and 1
     sound = sound / (2.0**15)
 
-    # Just one channel
-    sound = sound[:, 0]
-
     # measure in seconds
     length_in_s = sound.shape[0] / sampFreq
     print("Audio length ", length_in_s)
@@ -44,6 +41,9 @@ def audio_filter():
         + 0.008 * np.sin(2 * np.pi * 8000.0 * time)
         + 0.006 * np.sin(2 * np.pi * 2500.0 * time)
     )
+    if sound.ndim > 1:
+        # Same noise on every channel
+        yerr = yerr[:, np.newaxis]
     signal = sound + yerr
 
     # Zoom
@@ -52,8 +52,8 @@ def audio_filter():
     plt.show()
 
     # Fourier transform
-    fft_spectrum = np.fft.rfft(signal)
-    freq = np.fft.rfftfreq(signal.size, d=1.0 / sampFreq)
+    fft_spectrum = np.fft.rfft(signal, axis=0)
+    freq = np.fft.rfftfreq(signal.shape[0], d=1.0 / sampFreq)
     print("Fourier transform", fft_spectrum)
     fft_spectrum_abs = np.abs(fft_spectrum)
 
@@ -68,7 +68,7 @@ def audio_filter():
         if f > 5000 and f < 6100:
             fft_spectrum[i] = 0.0
 
-    noiseless_signal = np.fft.irfft(fft_spectrum)
+    noiseless_signal = np.fft.irfft(fft_spectrum, axis=0)
     # Audio plot
     plt.plot(time, noiseless_signal, "r")
     plt.xlabel("time, signal")
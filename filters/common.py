@@ -0,0 +1,244 @@
+"""Filtrado por bloques y cache de disenos comunes a filters.py e interfaz/filters.py."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from tempfile import TemporaryFile
+
+import numpy as np
+from scipy.signal import lfilter, lfilter_zi, oaconvolve
+
+# Coeficientes a partir de los que la fft gana a lfilter (benchmark.py --fir),
+# sobre toda la senal o en bloques de FFT_LONG_BLOCK muestras o mas, y en
+# bloques mas cortos, donde pesa el coste fijo de cada fft
+FFT_MIN_TAPS = 128
+FFT_MIN_TAPS_SHORT_BLOCKS = 512
+FFT_LONG_BLOCK = 16384
+
+# Disenos distintos que se guardan en la cache de iir_design y fir_design
+DESIGN_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=DESIGN_CACHE_SIZE)
+def _cached_design(design, *args):
+    """Disena cada filtro una sola vez y guarda los coeficientes en una cache lru."""
+    return design(*args)
+
+
+def cached_design(design, *args):
+    """Coeficientes de design(*args), que solo se calculan la primera vez.
+
+    Los argumentos forman la clave de la cache, asi que tienen que ser
+    hashables (las frecuencias de corte van como tupla).
+    """
+    return _copy(_cached_design(design, *args))
+
+
+def _copy(design):
+    """Copia un diseno de la cache para que quien lo use no la modifique."""
+    if isinstance(design, np.ndarray):
+        return design.copy()
+    return tuple(np.copy(x) if isinstance(x, np.ndarray) else x for x in design)
+
+
+def design_cache_info():
+    """Aciertos, fallos y tamano de la cache de disenos."""
+    return _cached_design.cache_info()
+
+
+def clear_design_cache():
+    """Vacia la cache de disenos y sus contadores."""
+    _cached_design.cache_clear()
+
+
+def fir_method(taps, method="auto", blocksize=None):
+    """Elige la convolucion directa o por fft segun coeficientes y bloque."""
+    if method == "auto":
+        min_taps = FFT_MIN_TAPS
+        if blocksize is not None and blocksize < FFT_LONG_BLOCK:
+            min_taps = FFT_MIN_TAPS_SHORT_BLOCKS
+        method = "fft" if len(taps) >= min_taps else "direct"
+    return method
+
+
+def fft_convolve(signal, taps):
+    """Convolucion completa por solapamiento y suma (overlap-add) en el eje 0."""
+    taps = np.reshape(taps, (-1,) + (1,) * (np.ndim(signal) - 1))
+    return oaconvolve(signal, taps, axes=0)
+
+
+def by_channel(func, signal, workers=None):
+    """Aplica func a toda la senal de una vez o canal a canal en workers hilos.
+
+    signal puede ser (muestras,) o (muestras, canales) y func filtra a lo
+    largo del eje 0. lfilter, sosfilt y las fft de scipy sueltan el GIL, asi
+    que los hilos reparten los canales entre nucleos sin copiar la senal.
+    """
+    signal = np.asarray(signal)
+    if not workers or workers < 2 or signal.ndim < 2 or signal.shape[1] < 2:
+        return func(signal)
+    with ThreadPoolExecutor(min(workers, signal.shape[1])) as pool:
+        channels = list(pool.map(func, np.moveaxis(signal, 1, 0)))
+    return np.stack(channels, axis=1)
+
+
+class StreamFilter(object):
+    """Filtro que procesa la senal por bloques guardando su estado.
+
+    Filtrar los bloques en orden da exactamente el mismo resultado que
+    lfilter(b, a, signal, zi=zi) sobre la senal completa. Los bloques se
+    filtran a lo largo del eje 0, asi que pueden ser (muestras,) o
+    (muestras, canales). La excepcion son los fir largos, que se filtran por
+    fft con solapamiento y suma (method="fft", o "auto" segun fir_method y
+    el primer bloque) y coinciden con lfilter salvo por el redondeo.
+    """
+
+    def __init__(self, b, a=1.0, zi=None, method="auto"):
+        """Guarda los coeficientes y el estado inicial (ceros por defecto)."""
+        self.b = np.atleast_1d(b)
+        self.a = np.atleast_1d(a)
+        self.zi = zi
+        self.history = None
+        self.method = "direct"
+        if len(self.a) == 1:
+            self.b = self.b / self.a[0]
+            self.method = method
+
+    def process(self, block):
+        """Filtra un bloque y actualiza el estado."""
+        block = np.asarray(block, dtype="float64")
+        if self.method == "auto":
+            self.method = fir_method(self.b, "auto", len(block))
+        if self.method == "fft":
+            return self._overlap_add(block)
+        if len(self.a) == 1:
+            return self._convolve(block)
+        if self.zi is None:
+            order = max(len(self.a), len(self.b)) - 1
+            self.zi = np.zeros((order,) + block.shape[1:])
+        filtered, self.zi = lfilter(self.b, self.a, block, axis=0, zi=self.zi)
+        return filtered
+
+    def _convolve(self, block):
+        """Filtra un bloque fir igual que lfilter, con una convolucion completa."""
+        # lfilter no usa un estado para fir: convoluciona toda la senal y suma
+        # zi a las primeras salidas, asi que se guarda la cola de la entrada
+        if self.history is None:
+            self.history = block[:0]
+        data = np.concatenate([self.history, block])
+        start = len(self.history)
+        # Si el bloque no es mas largo que los coeficientes numpy convoluciona
+        # por otro camino y redondea distinto; los ceros no llegan a la salida
+        padding = np.zeros((max(len(self.b) + 1 - len(data), 0),) + data.shape[1:])
+        filtered = np.apply_along_axis(
+            lambda y: np.convolve(self.b, y), 0, np.concatenate([data, padding])
+        )
+        filtered = filtered[start : start + len(block)].copy()
+        if self.zi is not None:
+            count = min(len(self.zi), len(filtered))
+            filtered[:count] += self.zi[:count]
+            self.zi = self.zi[count:]
+        self.history = data[max(len(data) - len(self.b) + 1, 0) :]
+        return filtered
+
+    def _overlap_add(self, block):
+        """Filtra un bloque fir por fft y guarda la cola para el siguiente."""
+        # La cola de la convolucion es el estado zf de lfilter
+        filtered = fft_convolve(block, self.b)
+        if self.zi is None:
+            self.zi = np.zeros((len(self.b) - 1,) + block.shape[1:])
+        filtered[: len(self.zi)] += self.zi
+        self.zi = filtered[len(block) :]
+        return filtered[: len(block)].copy()
+
+    def reset(self):
+        """Vuelve al estado inicial de ceros."""
+        self.zi = None
+        self.history = None
+
+
+def filter_file(
+    path_in,
+    path_out,
+    b,
+    a=1.0,
+    fbf=False,
+    blocksize=65536,
+    method="auto",
+    subtype=None,
+):
+    """Filtra un archivo de audio por bloques sin cargarlo entero.
+
+    Con fbf=False el resultado es identico a lfilter sobre todo el archivo
+    (salvo por el redondeo si un fir largo se filtra por fft, ver StreamFilter).
+    filtfilt no es causal: necesita el final de la senal antes de dar la
+    primera muestra, asi que con fbf=True la pasada hacia delante se guarda
+    en un archivo temporal en disco y se recorre al reves. El resultado es
+    el de filtfilt, pero no se puede usar sobre un flujo en directo.
+
+    La salida se escribe con el subtipo dado o, por defecto, con el de la
+    entrada si el formato de salida lo admite: un WAV en PCM_16 recortaria y
+    redondearia la salida de una entrada en coma flotante.
+    """
+    import soundfile as sf
+
+    with sf.SoundFile(path_in) as src:
+        if subtype is None:
+            out_format = os.path.splitext(path_out)[1][1:].upper()
+            if sf.check_format(out_format, src.subtype):
+                subtype = src.subtype
+        with sf.SoundFile(path_out, "w", src.samplerate, src.channels, subtype) as dst:
+            if not fbf:
+                stream = StreamFilter(b, a, method=method)
+                for block in src.blocks(blocksize, dtype="float64", always_2d=True):
+                    dst.write(stream.process(block))
+            else:
+                _filtfilt_blocks(
+                    src, dst, np.atleast_1d(b), np.atleast_1d(a), blocksize, method
+                )
+
+
+def _filtfilt_blocks(src, dst, b, a, blocksize, method):
+    """Hace filtfilt por bloques con la misma extension impar que scipy."""
+    edge = 3 * max(len(a), len(b))
+    frames = src.frames
+    if frames <= edge:
+        raise ValueError(
+            "The length of the input vector x must be greater than padlen, "
+            "which is {}.".format(edge)
+        )
+
+    # Extension impar de longitud edge en cada extremo (padtype="odd")
+    head = src.read(edge + 1, dtype="float64", always_2d=True)
+    src.seek(frames - edge - 1)
+    tail = src.read(edge + 1, dtype="float64", always_2d=True)
+    src.seek(0)
+    front = 2 * head[0:1] - head[edge:0:-1]
+    back = 2 * tail[-1:] - tail[-2::-1]
+    zi = lfilter_zi(b, a)[:, None]
+
+    with TemporaryFile() as tmp:
+        y = np.memmap(
+            tmp, dtype="float64", mode="w+", shape=(frames + 2 * edge, src.channels)
+        )
+
+        # Pasada hacia delante
+        stream = StreamFilter(b, a, zi * front[0], method)
+        y[:edge] = stream.process(front)
+        start = edge
+        for block in src.blocks(blocksize, dtype="float64", always_2d=True):
+            y[start : start + len(block)] = stream.process(block)
+            start += len(block)
+        y[start:] = stream.process(back)
+
+        # Pasada hacia atras, sobrescribiendo los bloques ya leidos
+        stream = StreamFilter(b, a, zi * y[-1], method)
+        stop = len(y)
+        while stop > 0:
+            start = max(stop - blocksize, 0)
+            y[start:stop] = stream.process(y[start:stop][::-1])[::-1]
+            stop = start
+
+        for start in range(edge, frames + edge, blocksize):
+            dst.write(y[start : min(start + blocksize, frames + edge)])
+        del y
@@ -1,5 +1,22 @@
 """Aqui empieza."""
 
+from functools import partial
+
+# Lo que no se usa aqui se reexporta para quien ya lo importaba de filters
+from common import (  # noqa: F401
+    DESIGN_CACHE_SIZE,
+    FFT_LONG_BLOCK,
+    FFT_MIN_TAPS,
+    FFT_MIN_TAPS_SHORT_BLOCKS,
+    StreamFilter,
+    by_channel,
+    cached_design,
+    clear_design_cache,
+    design_cache_info,
+    fft_convolve,
+    filter_file,
+    fir_method,
+)
 from scipy.fft import fft, fftfreq
 from scipy.fftpack import fftshift
 from scipy.signal import filtfilt, firwin, iirfilter, kaiserord, lfilter
@@ -8,28 +25,63 @@ from scipy.signal import filtfilt, firwin, iirfilter, kaiserord, lfilter
 def fourier_transform(signal, sample_rate=44100, duration=5):
     """Funcion de fourirer."""
     N = sample_rate * duration
-    yf = fft(signal)
+    yf = fft(signal, axis=0)
     xf = fftfreq(N, 1 / sample_rate)
-    yf = fftshift(yf)
+    yf = fftshift(yf, axes=0)
     xf = fftshift(xf)
     return xf, yf
 
 
-def iir_filter(signal, f_cutoff, f_sampling, fbf=False):
-    """Funcion de un filtro iir."""
-    b, a = iirfilter(4, Wn=f_cutoff, fs=f_sampling, btype="low", ftype="butter")
+def iir_design(f_cutoff, f_sampling):
+    """Coeficientes de un filtro iir."""
+    return cached_design(_design, "IIR", "low", (f_cutoff,), 4, f_sampling)
+
+
+def iir_filter(signal, f_cutoff, f_sampling, fbf=False, workers=None):
+    """Funcion de un filtro iir.
+
+    signal puede ser (muestras,) o (muestras, canales); con workers > 1 los
+    canales se filtran en paralelo (ver by_channel).
+    """
+    b, a = iir_design(f_cutoff, f_sampling)
     if not fbf:
-        filtered = lfilter(b, a, signal)
+        filtered = by_channel(partial(lfilter, b, a, axis=0), signal, workers)
     else:
-        filtered = filtfilt(b, a, signal)
+        filtered = by_channel(partial(filtfilt, b, a, axis=0), signal, workers)
     return filtered
 
 
-def fir_filter(signal, nyq_rate, cutoff_hz):
-    """Funcion de un filtro fir."""
+def fir_design(nyq_rate, cutoff_hz):
+    """Coeficientes de un filtro fir."""
+    return cached_design(_design, "FIR", "low", (cutoff_hz,), None, 2.0 * nyq_rate)
+
+
+def _design(ir_type, band, f_cutoff, order, f_sampling):
+    """Disena un filtro iir de Butterworth o un fir con ventana de Kaiser."""
+    if ir_type == "IIR":
+        return iirfilter(
+            order, Wn=f_cutoff[0], fs=f_sampling, btype=band, ftype="butter"
+        )
+    nyq_rate = f_sampling / 2.0
     width = 5.0 / nyq_rate
     ripple_db = 20.0
     N, beta = kaiserord(ripple_db, width)
-    taps = firwin(N, cutoff_hz / nyq_rate, window=("kaiser", beta))
-    filtered = lfilter(taps, 1.0, signal)
+    taps = firwin(N, f_cutoff[0] / nyq_rate, window=("kaiser", beta))
+    return taps, N
+
+
+def fir_filter(signal, nyq_rate, cutoff_hz, method="auto", workers=None):
+    """Funcion de un filtro fir.
+
+    Con method="fft" los coeficientes se aplican por fft con solapamiento y
+    suma en vez de con lfilter; "auto" lo hace a partir de FFT_MIN_TAPS.
+    signal puede ser (muestras,) o (muestras, canales); con workers > 1 los
+    canales se filtran en paralelo (ver by_channel).
+    """
+    taps, N = fir_design(nyq_rate, cutoff_hz)
+    if fir_method(taps, method) == "fft":
+        filtered = by_channel(partial(fft_convolve, taps=taps), signal, workers)
+        filtered = filtered[: len(signal)]
+    else:
+        filtered = by_channel(partial(lfilter, taps, 1.0, axis=0), signal, workers)
     return filtered, taps, N
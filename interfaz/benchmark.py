@@ -0,0 +1,273 @@
+"""Benchmarks for the audio filters."""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from scipy.signal import firwin, freqz, freqz_zpk, lfilter, sosfilt, sosfreqz
+
+from filters import StreamFilter, fft_convolve, iir_design, iir_filter
+
+ORDERS = range(1, 13)
+RATES = (44100, 48000, 96000, 192000)
+CASES = (
+    ("Low pass", [1000]),
+    ("High pass", [1000]),
+    ("Band pass", [300, 3400]),
+    ("Band pass", [900, 1100]),
+)
+TAPS = (8, 16, 32, 64, 96, 128, 160, 192, 256, 512, 1024, 2048, 4096, 8192)
+BLOCKSIZES = (1024, 4096, 65536)
+
+
+def time_call(func, args, repeats=5, **kwargs):
+    """Return the median time of func(*args, **kwargs) in seconds."""
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        runs.append(time.perf_counter() - start)
+    return float(np.median(runs))
+
+
+def iir_accuracy(f_cutoff, f_sampling, filter_type, order, signal):
+    """Compare the (b, a) and SOS forms of one filter against its zeros and poles.
+
+    Returns the largest pole radius of the (b, a) denominator, which is 1 or more
+    when rounding made the filter unstable, the largest error of each frequency
+    response against the exact zero-pole-gain response, and the largest difference
+    between the lfilter and sosfilt outputs for signal.
+    """
+    b, a = iir_design(f_cutoff, f_sampling, filter_type, order)
+    sos = iir_design(f_cutoff, f_sampling, filter_type, order, "sos")
+    z, p, k = iir_design(f_cutoff, f_sampling, filter_type, order, "zpk")
+    worN = np.geomspace(10.0, f_sampling / 2, 2048)
+    exact = freqz_zpk(z, p, k, worN=worN, fs=f_sampling)[1]
+    with np.errstate(all="ignore"):
+        ba_output = lfilter(b, a, signal)
+        difference = np.abs(ba_output - sosfilt(sos, signal)).max()
+    return {
+        "ba_pole_radius": float(np.abs(np.roots(a)).max()),
+        "sos_pole_radius": float(np.abs(p).max()),
+        "ba_response_error": float(
+            np.abs(freqz(b, a, worN=worN, fs=f_sampling)[1] - exact).max()
+        ),
+        "sos_response_error": float(
+            np.abs(sosfreqz(sos, worN=worN, fs=f_sampling)[1] - exact).max()
+        ),
+        "output_difference": float(difference) if np.isfinite(difference) else None,
+    }
+
+
+def iir_bench(orders=ORDERS, rates=RATES, seconds=5.0, repeats=5, seed=0):
+    """Time and check both iir_filter paths for every case, order and rate."""
+    rng = np.random.default_rng(seed)
+    results = []
+    for f_sampling in rates:
+        signal = rng.standard_normal(int(seconds * f_sampling))
+        for filter_type, f_cutoff in CASES:
+            for order in orders:
+                args = (signal, f_cutoff, f_sampling, filter_type, order)
+                result = {
+                    "fs": f_sampling,
+                    "type": filter_type,
+                    "cutoff": f_cutoff,
+                    "order": order,
+                }
+                with np.errstate(all="ignore"):
+                    for sos in (False, True):
+                        path = "sos" if sos else "ba"
+                        result[path] = time_call(iir_filter, args, repeats, sos=sos)
+                        result[path + "_fbf"] = time_call(
+                            iir_filter, args, repeats, fbf=True, sos=sos
+                        )
+                result.update(
+                    iir_accuracy(f_cutoff, f_sampling, filter_type, order, signal)
+                )
+                results.append(result)
+    return results
+
+
+def print_iir(results):
+    """Print one line per iir_bench result."""
+    print(
+        "%7s %-9s %-11s %5s %8s %8s %8s %8s %8s %10s %10s %10s"
+        % (
+            "fs",
+            "type",
+            "cutoff",
+            "order",
+            "ba ms",
+            "sos ms",
+            "ba fbf",
+            "sos fbf",
+            "ba pole",
+            "ba error",
+            "sos error",
+            "output",
+        )
+    )
+    for result in results:
+        difference = result["output_difference"]
+        print(
+            "%7d %-9s %-11s %5d %8.2f %8.2f %8.2f %8.2f %8.5f %10.2e %10.2e %10s"
+            % (
+                result["fs"],
+                result["type"],
+                "-".join(str(f) for f in result["cutoff"]),
+                result["order"],
+                result["ba"] * 1e3,
+                result["sos"] * 1e3,
+                result["ba_fbf"] * 1e3,
+                result["sos_fbf"] * 1e3,
+                result["ba_pole_radius"],
+                result["ba_response_error"],
+                result["sos_response_error"],
+                "nan" if difference is None else "%.2e" % difference,
+            )
+        )
+
+
+def stream(taps, signal, blocksize, method):
+    """Filter signal block by block with a StreamFilter."""
+    filter_ = StreamFilter(taps, method=method)
+    return np.concatenate(
+        [
+            filter_.process(signal[start : start + blocksize])
+            for start in range(0, len(signal), blocksize)
+        ]
+    )
+
+
+def fir_bench(
+    taps_counts=TAPS,
+    blocksizes=BLOCKSIZES,
+    f_sampling=44100,
+    seconds=5.0,
+    repeats=5,
+    seed=0,
+):
+    """Time direct and overlap-add FFT filtering of low-pass FIRs of each length.
+
+    Every result holds the one-shot times of lfilter and fft_convolve, the
+    streaming time of both StreamFilter methods for each block size, and the
+    largest difference between the FFT and lfilter outputs relative to the peak
+    output.
+    """
+    rng = np.random.default_rng(seed)
+    signal = rng.standard_normal(int(seconds * f_sampling))
+    results = []
+    for n_taps in taps_counts:
+        taps = firwin(n_taps, 0.1)
+        reference = lfilter(taps, 1.0, signal)
+        filtered = fft_convolve(signal, taps)[: len(signal)]
+        result = {
+            "taps": n_taps,
+            "direct": time_call(lfilter, (taps, 1.0, signal), repeats),
+            "fft": time_call(fft_convolve, (signal, taps), repeats),
+            "error": float(
+                np.abs(filtered - reference).max() / np.abs(reference).max()
+            ),
+        }
+        for blocksize in blocksizes:
+            for method in ("direct", "fft"):
+                result["%s_%d" % (method, blocksize)] = time_call(
+                    stream, (taps, signal, blocksize, method), repeats
+                )
+        results.append(result)
+    return results
+
+
+def crossover(results, direct="direct", fft="fft"):
+    """Return the fewest taps from which FFT filtering is always the faster one."""
+    taps = None
+    for result in reversed(results):
+        if result[fft] >= result[direct]:
+            break
+        taps = result["taps"]
+    return taps
+
+
+def print_fir(results, blocksizes=BLOCKSIZES):
+    """Print one line per fir_bench result and the measured crossovers."""
+    columns = ["direct", "fft"]
+    for blocksize in blocksizes:
+        columns += ["direct_%d" % blocksize, "fft_%d" % blocksize]
+    print("%6s " % "taps" + " ".join("%12s" % c for c in columns) + " %9s" % "error")
+    for result in results:
+        print(
+            "%6d " % result["taps"]
+            + " ".join("%12.2f" % (result[c] * 1e3) for c in columns)
+            + " %9.1e" % result["error"]
+        )
+    print("crossover one-shot: %s taps" % crossover(results))
+    for blocksize in blocksizes:
+        print(
+            "crossover %d-sample blocks: %s taps"
+            % (
+                blocksize,
+                crossover(results, "direct_%d" % blocksize, "fft_%d" % blocksize),
+            )
+        )
+
+
+def parse_args():
+    """Parse input arguments."""
+    parser = argparse.ArgumentParser(description="Audio filter benchmarks")
+    parser.add_argument(
+        "--orders",
+        help="Filter orders to check.",
+        type=int,
+        nargs="+",
+        default=list(ORDERS),
+    )
+    parser.add_argument(
+        "--rates",
+        help="Sample rates to check (--fir uses the first).",
+        type=int,
+        nargs="+",
+        default=list(RATES),
+    )
+    parser.add_argument(
+        "--seconds", help="Length of the test signal.", type=float, default=5.0
+    )
+    parser.add_argument(
+        "--repeats", help="Timing repeats per filter.", type=int, default=5
+    )
+    parser.add_argument(
+        "--fir",
+        help="Find the FIR length from which FFT filtering beats lfilter.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--taps",
+        help="FIR lengths to time with --fir.",
+        type=int,
+        nargs="+",
+        default=list(TAPS),
+    )
+    parser.add_argument(
+        "--blocksizes",
+        help="Streaming block sizes to time with --fir.",
+        type=int,
+        nargs="+",
+        default=list(BLOCKSIZES),
+    )
+    parser.add_argument("--json", help="Write the results to this file.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.fir:
+        results = fir_bench(
+            args.taps, args.blocksizes, args.rates[0], args.seconds, args.repeats
+        )
+        print_fir(results, args.blocksizes)
+    else:
+        results = iir_bench(args.orders, args.rates, args.seconds, args.repeats)
+        print_iir(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
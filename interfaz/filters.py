@@ -1,36 +1,136 @@
 """Aqui empieza."""
 
-from scipy.signal import filtfilt, firwin, iirfilter, kaiserord, lfilter
+import os
+import sys
+from functools import partial
 
+import numpy as np
+from scipy.signal import (
+    filtfilt,
+    firwin,
+    iirfilter,
+    kaiserord,
+    lfilter,
+    sosfilt,
+    sosfiltfilt,
+)
 
-def iir_filter(signal, f_cutoff, f_sampling, filter_type, order, fbf=False):
-    """Funcion de un filtro."""
+# El filtrado por bloques y la cache de disenos son los de filters/common.py
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "filters")
+)
+
+# Lo que no se usa aqui se reexporta para quien ya lo importaba de filters
+from common import (  # noqa: E402, F401
+    DESIGN_CACHE_SIZE,
+    FFT_LONG_BLOCK,
+    FFT_MIN_TAPS,
+    FFT_MIN_TAPS_SHORT_BLOCKS,
+    StreamFilter,
+    by_channel,
+    cached_design,
+    clear_design_cache,
+    design_cache_info,
+    fft_convolve,
+    filter_file,
+    fir_method,
+)
+
+
+def iir_design(f_cutoff, f_sampling, filter_type, order, output="ba"):
+    """Coeficientes de un filtro iir, como (b, a) o en secciones de orden 2."""
+    return cached_design(
+        _design,
+        "IIR",
+        filter_type,
+        _cutoffs(f_cutoff, filter_type),
+        order,
+        f_sampling,
+        output,
+    )
+
+
+def _iir_design(f_cutoff, f_sampling, filter_type, order, output):
+    """Disena un filtro iir de Butterworth."""
     if filter_type == "Low pass":
-        b, a = iirfilter(
-            order, Wn=f_cutoff[0], fs=f_sampling, btype="low", ftype="butter"
+        design = iirfilter(
+            order,
+            Wn=f_cutoff[0],
+            fs=f_sampling,
+            btype="low",
+            ftype="butter",
+            output=output,
         )
     elif filter_type == "High pass":
-        b, a = iirfilter(
-            order, Wn=f_cutoff[0], fs=f_sampling, btype="high", ftype="butter"
+        design = iirfilter(
+            order,
+            Wn=f_cutoff[0],
+            fs=f_sampling,
+            btype="high",
+            ftype="butter",
+            output=output,
         )
     elif filter_type == "Band pass":
-        b, a = iirfilter(
+        design = iirfilter(
             order,
             Wn=[f_cutoff[0], f_cutoff[1]],
             fs=f_sampling,
             btype="band",
             ftype="butter",
+            output=output,
         )
+    return design
+
+
+def iir_filter(
+    signal,
+    f_cutoff,
+    f_sampling,
+    filter_type,
+    order,
+    fbf=False,
+    sos=False,
+    workers=None,
+):
+    """Funcion de un filtro.
+
+    Con sos=True el filtro se disena y se aplica en secciones de orden 2
+    (sosfilt/sosfiltfilt). Los polinomios (b, a) pierden precision con
+    ordenes altos o bandas estrechas y el filtro puede volverse inestable.
+    signal puede ser (muestras,) o (muestras, canales); con workers > 1 los
+    canales se filtran en paralelo (ver by_channel).
+    """
+    if sos:
+        sections = iir_design(f_cutoff, f_sampling, filter_type, order, "sos")
+        if not fbf:
+            func = partial(sosfilt, sections, axis=0)
+        else:
+            func = partial(sosfiltfilt, sections, axis=0)
+        return by_channel(func, signal, workers)
+
+    b, a = iir_design(f_cutoff, f_sampling, filter_type, order)
 
     if not fbf:
-        filtered = lfilter(b, a, signal)
+        filtered = by_channel(partial(lfilter, b, a, axis=0), signal, workers)
     else:
-        filtered = filtfilt(b, a, signal)
+        filtered = by_channel(partial(filtfilt, b, a, axis=0), signal, workers)
     return filtered
 
 
-def fir_filter(signal, nyq_rate, f_cutoff, filter_type):
-    """Funcion de otro filtro."""
+def fir_design(nyq_rate, f_cutoff, filter_type):
+    """Coeficientes de un filtro fir."""
+    return cached_design(
+        _design,
+        "FIR",
+        filter_type,
+        _cutoffs(f_cutoff, filter_type),
+        None,
+        2.0 * nyq_rate,
+    )
+
+
+def _fir_design(nyq_rate, f_cutoff, filter_type):
+    """Disena un filtro fir con ventana de Kaiser."""
     width = 5.0 / nyq_rate
     ripple_db = 20.0
     N, beta = kaiserord(ripple_db, width)
@@ -48,6 +148,64 @@ def fir_filter(signal, nyq_rate, f_cutoff, filter_type):
             pass_zero=False,
             window=("kaiser", beta),
         )
+    return taps, N
+
+
+def _cutoffs(f_cutoff, filter_type):
+    """Frecuencias de corte que usa el tipo de filtro, como tupla."""
+    # La interfaz pasa siempre las dos; la segunda solo cuenta en pasa banda
+    if filter_type == "Band pass":
+        return tuple(f_cutoff[:2])
+    return tuple(f_cutoff[:1])
+
+
+def _design(ir_type, filter_type, f_cutoff, order, f_sampling, output=None):
+    """Disena un filtro iir o fir con las frecuencias de corte como tupla."""
+    if ir_type == "IIR":
+        design = _iir_design(f_cutoff, f_sampling, filter_type, order, output)
+    else:
+        design = _fir_design(f_sampling / 2.0, f_cutoff, filter_type)
+    return design
+
+
+def fir_filter(signal, nyq_rate, f_cutoff, filter_type, method="auto", workers=None):
+    """Funcion de otro filtro.
 
-    filtered = lfilter(taps, 1.0, signal)
+    Con method="fft" los coeficientes se aplican por fft con solapamiento y
+    suma en vez de con lfilter; "auto" lo hace a partir de FFT_MIN_TAPS.
+    signal puede ser (muestras,) o (muestras, canales); con workers > 1 los
+    canales se filtran en paralelo (ver by_channel).
+    """
+    taps, N = fir_design(nyq_rate, f_cutoff, filter_type)
+
+    if fir_method(taps, method) == "fft":
+        filtered = by_channel(partial(fft_convolve, taps=taps), signal, workers)
+        filtered = filtered[: len(signal)]
+    else:
+        filtered = by_channel(partial(lfilter, taps, 1.0, axis=0), signal, workers)
     return filtered, taps, N
+
+
+class SosStreamFilter(object):
+    """Filtro en secciones de orden 2 que procesa la senal por bloques.
+
+    Da exactamente el mismo resultado que sosfilt(sos, signal) sobre la senal
+    completa.
+    """
+
+    def __init__(self, sos, zi=None):
+        """Guarda las secciones y el estado inicial (ceros por defecto)."""
+        self.sos = np.atleast_2d(sos)
+        self.zi = zi
+
+    def process(self, block):
+        """Filtra un bloque y actualiza el estado."""
+        block = np.asarray(block, dtype="float64")
+        if self.zi is None:
+            self.zi = np.zeros((len(self.sos), 2) + block.shape[1:])
+        filtered, self.zi = sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return filtered
+
+    def reset(self):
+        """Vuelve al estado inicial de ceros."""
+        self.zi = None
@@ -130,7 +130,6 @@ class FileSelectorWindow(QWidget):
 
             self.sampFreq, self.sound = wavfile.read("MB_Song.wav")
             self.sound = self.sound / (2.0**15)
-            self.sound = self.sound[:, 0]
             self.length_in_s = self.sound.shape[0] / self.sampFreq
 
     def playAudio(self):
@@ -155,8 +154,8 @@ class FileSelectorWindow(QWidget):
         self.layout.addWidget(self.canvas)
 
     def freqGraph(self):
-        fft_spectrum = np.fft.rfft(self.sound)
-        freq = np.fft.rfftfreq(self.sound.size, d=1.0 / self.sampFreq)
+        fft_spectrum = np.fft.rfft(self.sound, axis=0)
+        freq = np.fft.rfftfreq(self.sound.shape[0], d=1.0 / self.sampFreq)
         fft_spectrum_abs = np.abs(fft_spectrum)
         self.ax.plot(freq, fft_spectrum_abs)
         self.ax.set_xlabel("Frequency")
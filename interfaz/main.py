@@ -273,8 +273,8 @@ class MainWindow(QWidget):
 
             self.sampFreq, self.sound = wavfile.read("MB_Song.wav")
             self.nyquist = self.sampFreq / 2.0
+            # Keep every channel: (samples,) for mono, (samples, channels) otherwise
             self.sound = self.sound / (2.0**15)
-            self.sound = self.sound[:, 0]
             self.length_in_s = self.sound.shape[0] / self.sampFreq
 
             self.soundButton1.show()
@@ -304,8 +304,8 @@ class MainWindow(QWidget):
 
     def freqGraph(self):
         """Show orginal fourier graph."""
-        fft_spectrum = np.fft.rfft(self.sound)
-        freq = np.fft.rfftfreq(self.sound.size, d=1.0 / self.sampFreq)
+        fft_spectrum = np.fft.rfft(self.sound, axis=0)
+        freq = np.fft.rfftfreq(self.sound.shape[0], d=1.0 / self.sampFreq)
         fft_spectrum_abs = np.abs(fft_spectrum)
 
         self.figF1, self.ax = plt.subplots(figsize=(4, 4))
@@ -395,7 +395,8 @@ class MainWindow(QWidget):
         if filename:
             try:
                 filename = filename + "." + self.format_name
-                sf.write(filename, self.x_filtered, samplerate=44100)
+                # (samples, channels) keeps the channel layout of the original
+                sf.write(filename, self.x_filtered, samplerate=self.sampFreq)
 
             except Exception as e:
                 print("Error al guardar el archivo:", e)
@@ -414,6 +415,7 @@ class MainWindow(QWidget):
                 self.sampFreq,
                 self.pass_type,
                 self.order_slider.value(),
+                sos=True,
             )
         elif self.ir_type == "FIR":
             self.x_filtered, taps, n = fir_filter(
@@ -424,8 +426,8 @@ class MainWindow(QWidget):
             )
 
         # Find the fourier transform of the filtered sound
-        fft_spectrum = np.fft.rfft(self.x_filtered)
-        freq = np.fft.rfftfreq(self.sound.size, d=1.0 / self.sampFreq)
+        fft_spectrum = np.fft.rfft(self.x_filtered, axis=0)
+        freq = np.fft.rfftfreq(self.sound.shape[0], d=1.0 / self.sampFreq)
         fft_spectrum_abs = np.abs(fft_spectrum)
 
         # Plot the filtered sound and fourier graphs
@@ -136,7 +136,6 @@ class SelectFile(QWidget):
 
             self.sampFreq, self.sound = wavfile.read("MB_Song.wav")
             self.sound = self.sound / (2.0**15)
-            self.sound = self.sound[:, 0]
             self.length_in_s = self.sound.shape[0] / self.sampFreq
 
             self.soundButton.show()
@@ -168,8 +167,8 @@ class SelectFile(QWidget):
         self.deleteSButton.show()
 
     def freqGraph(self):
-        fft_spectrum = np.fft.rfft(self.sound)
-        freq = np.fft.rfftfreq(self.sound.size, d=1.0 / self.sampFreq)
+        fft_spectrum = np.fft.rfft(self.sound, axis=0)
+        freq = np.fft.rfftfreq(self.sound.shape[0], d=1.0 / self.sampFreq)
         fft_spectrum_abs = np.abs(fft_spectrum)
 
         self.figF, self.ax = plt.subplots()
@@ -0,0 +1,695 @@
+"""Micro-benchmarks for the SORT tracker."""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from sort import (
+    AFFINITIES,
+    KalmanBoxTracker,
+    KalmanBoxTrackerBank,
+    Sort,
+    associate_detections_to_trackers,
+    convert_bbox_to_z,
+    convert_x_to_bbox,
+    iou_batch,
+    kalman_predict,
+    kalman_update,
+    linear_assignment,
+)
+
+
+def synthetic_frames(n_objects, n_frames, seed=0):
+    """Generate detections of objects moving at constant velocity on a sparse grid."""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(n_objects)))
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side)), -1).reshape(-1, 2)
+    start = grid[:n_objects] * 100.0 + rng.uniform(0, 20, (n_objects, 2))
+    velocity = rng.normal(0, 1.0, (n_objects, 2))
+    size = rng.uniform(30, 60, (n_objects, 2))
+    frames = []
+    for frame in range(n_frames):
+        top_left = start + velocity * frame + rng.normal(0, 0.5, (n_objects, 2))
+        dets = np.empty((n_objects, 5))
+        dets[:, :2] = top_left
+        dets[:, 2:4] = top_left + size
+        dets[:, 4] = 1.0
+        frames.append(dets)
+    return frames
+
+
+def synthetic_scene(
+    n_objects,
+    n_frames,
+    density=0.05,
+    speed=2.0,
+    noise=1.0,
+    miss_rate=0.05,
+    false_positives=0.02,
+    seed=0,
+):
+    """Generate MOT-style detections of people walking through a square scene.
+
+    The scene is sized so that the boxes cover density of its area. Objects move at
+    a mean of speed pixels per frame and bounce off the borders, each detection is
+    missed with probability miss_rate, its corners get Gaussian noise of noise
+    pixels, and false_positives times n_objects spurious boxes are added per frame
+    on average. Returns the shuffled [x1,y1,x2,y2,score] detections of every frame
+    and the (n_frames, n_objects, 4) true boxes.
+    """
+    rng = np.random.default_rng(seed)
+    width = rng.uniform(20, 60, n_objects)
+    size = np.stack((width, width * rng.uniform(2, 3, n_objects)), axis=1)
+    side = np.sqrt(np.prod(size, axis=1).sum() / density)
+    position = rng.uniform(0, 1, (n_objects, 2)) * (side - size)
+    heading = rng.uniform(0, 2 * np.pi, n_objects)
+    velocity = np.stack((np.cos(heading), np.sin(heading)), axis=1)
+    velocity *= rng.exponential(speed, (n_objects, 1))
+
+    frames = []
+    truth = np.empty((n_frames, n_objects, 4))
+    for frame in range(n_frames):
+        position += velocity
+        bounced = (position < 0) | (position > side - size)
+        velocity[bounced] *= -1
+        position = np.clip(position, 0, side - size)
+        truth[frame, :, :2] = position
+        truth[frame, :, 2:] = position + size
+
+        seen = truth[frame, rng.random(n_objects) >= miss_rate]
+        n_false = rng.poisson(false_positives * n_objects)
+        false_size = size[rng.integers(0, n_objects, n_false)]
+        false_position = rng.uniform(0, 1, (n_false, 2)) * (side - false_size)
+        boxes = np.concatenate(
+            (
+                seen + rng.normal(0, noise, seen.shape),
+                np.concatenate((false_position, false_position + false_size), axis=1),
+            )
+        )
+        dets = np.empty((len(boxes), 5))
+        dets[:, :4] = boxes
+        dets[:, 4] = rng.uniform(0.5, 1.0, len(boxes))
+        frames.append(dets[rng.permutation(len(dets))])
+    return frames, truth
+
+
+def time_calls(func, args_list, repeats=5):
+    """Return the median over repeats of the mean time of func(*args) in seconds."""
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        runs.append((time.perf_counter() - start) / len(args_list))
+    return float(np.median(runs))
+
+
+def bench_iou_batch(frames, truth, repeats):
+    """Time iou_batch between consecutive frames."""
+    pairs = list(zip(frames[1:], frames[:-1]))
+    return time_calls(iou_batch, pairs, repeats)
+
+
+def affinity_bench(name):
+    """Return a SUITE entry timing AFFINITIES[name] between consecutive frames."""
+    affinity = AFFINITIES[name]
+
+    def bench(frames, truth, repeats):
+        pairs = [(dets, trks[:, :4]) for dets, trks in zip(frames[1:], frames[:-1])]
+        if name == "mahalanobis":
+            P0, R = KalmanBoxTracker.P0, KalmanBoxTracker.R
+            pairs = [
+                (dets, trks, np.broadcast_to(P0[:4, :4] + R, (len(trks), 4, 4)))
+                for dets, trks in pairs
+            ]
+        return time_calls(affinity, pairs, repeats)
+
+    return bench
+
+
+def bench_linear_assignment(frames, truth, repeats):
+    """Time linear_assignment on the IOU cost of consecutive frames."""
+    costs = [(-iou_batch(dets, trks),) for dets, trks in zip(frames[1:], frames[:-1])]
+    return time_calls(linear_assignment, costs, repeats)
+
+
+def bench_associate(frames, truth, repeats):
+    """Time associate_detections_to_trackers between consecutive frames."""
+    pairs = [(dets, trks[:, :4]) for dets, trks in zip(frames[1:], frames[:-1])]
+    return time_calls(associate_detections_to_trackers, pairs, repeats)
+
+
+def bench_kalman_tracker(frames, truth, repeats):
+    """Time a predict and update of one KalmanBoxTracker per object."""
+    trackers = [KalmanBoxTracker(box, i) for i, box in enumerate(truth[0])]
+
+    def step(boxes):
+        for trk, box in zip(trackers, boxes):
+            trk.predict()
+            trk.update(box)
+
+    return time_calls(step, [(boxes,) for boxes in truth[1:]], repeats)
+
+
+def bench_kalman_bank(frames, truth, repeats):
+    """Time a predict and update of a KalmanBoxTrackerBank holding every object."""
+    bank = KalmanBoxTrackerBank()
+    bank.add(truth[0], np.arange(truth.shape[1]))
+    indices = np.arange(truth.shape[1])
+
+    def step(boxes):
+        bank.predict()
+        bank.update(indices, boxes)
+
+    return time_calls(step, [(boxes,) for boxes in truth[1:]], repeats)
+
+
+def bench_sort_update(frames, truth, repeats, batched=True):
+    """Time Sort.update over the scene, once its tracks are confirmed."""
+    return float(
+        np.median([time_update(frames, batched=batched) for _ in range(repeats)])
+    )
+
+
+def bench_sort_update_objects(frames, truth, repeats):
+    """Time Sort.update with one KalmanBoxTracker per track."""
+    return bench_sort_update(frames, truth, repeats, batched=False)
+
+
+SUITE = {
+    "iou_batch": bench_iou_batch,
+    "giou_batch": affinity_bench("giou"),
+    "diou_batch": affinity_bench("diou"),
+    "center_batch": affinity_bench("center"),
+    "mahalanobis_batch": affinity_bench("mahalanobis"),
+    "linear_assignment": bench_linear_assignment,
+    "associate": bench_associate,
+    "kalman_tracker": bench_kalman_tracker,
+    "kalman_bank": bench_kalman_bank,
+    "sort_update": bench_sort_update,
+    "sort_update_objects": bench_sort_update_objects,
+}
+
+
+def run_suite(sizes, n_frames=50, repeats=5, components=None, **scene_args):
+    """Time every component of SUITE on a synthetic scene of each size.
+
+    Returns a JSON-serializable dict holding the configuration, the environment and
+    the median seconds per frame as results[component][str(size)].
+    """
+    components = components or list(SUITE)
+    results = {name: {} for name in components}
+    for size in sizes:
+        frames, truth = synthetic_scene(size, n_frames, **scene_args)
+        for name in components:
+            results[name][str(size)] = SUITE[name](frames, truth, repeats)
+            print("%-20s %8d %12.4f ms" % (name, size, results[name][str(size)] * 1e3))
+    try:
+        import lap  # noqa: F401
+
+        solver = "lap"
+    except ImportError:
+        solver = "scipy"
+    return {
+        "config": dict(sizes=sizes, frames=n_frames, repeats=repeats, **scene_args),
+        "environment": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "assignment": solver,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.1):
+    """Print the speed of report relative to baseline and return the regressions.
+
+    A regression is a component and size present in both that got slower by more
+    than tolerance, returned as (component, size, ratio) tuples.
+    """
+    regressions = []
+    print(
+        "%-20s %8s %12s %12s %8s" % ("component", "size", "baseline ms", "ms", "ratio")
+    )
+    for name, sizes in report["results"].items():
+        for size, seconds in sizes.items():
+            base = baseline["results"].get(name, {}).get(size)
+            if base is None:
+                continue
+            ratio = seconds / base
+            flag = ""
+            if ratio > 1 + tolerance:
+                regressions.append((name, int(size), ratio))
+                flag = " slower"
+            print(
+                "%-20s %8s %12.4f %12.4f %8.2f%s"
+                % (name, size, base * 1e3, seconds * 1e3, ratio, flag)
+            )
+    return regressions
+
+
+def filterpy_tracker(bbox):
+    """Create the filterpy KalmanFilter SORT used to build for one track."""
+    from filterpy.kalman import KalmanFilter
+
+    kf = KalmanFilter(dim_x=7, dim_z=4)
+    kf.F = np.array(KalmanBoxTracker.F)
+    kf.H = np.array(KalmanBoxTracker.H)
+    kf.R[2:, 2:] *= 10.0
+    kf.P[4:, 4:] *= 1000.0
+    kf.P *= 10.0
+    kf.Q[-1, -1] *= 0.01
+    kf.Q[4:, 4:] *= 0.01
+    kf.x[:4] = convert_bbox_to_z(bbox)
+    return kf
+
+
+def kalman_check(n_tracks=100, n_frames=200, miss_rate=0.2, seed=0):
+    """Compare kalman_predict and kalman_update with filterpy on a synthetic scene.
+
+    Every track is filtered from its noisy true boxes by both, with the model of
+    KalmanBoxTracker. Returns the largest difference of the states and of the
+    covariances over all tracks and frames, relative to the largest entry of each,
+    and the time of one predict and update with filterpy and with the sort core.
+    """
+    rng = np.random.default_rng(seed)
+    _, truth = synthetic_scene(n_tracks, n_frames, seed=seed)
+    observed = rng.random(truth.shape[:2]) >= miss_rate
+    boxes = truth + rng.normal(0, 1.0, truth.shape)
+    Q, R = KalmanBoxTracker.Q, KalmanBoxTracker.R
+    worst_x = worst_P = 0.0
+    filterpy_time = core_time = 0.0
+    for t in range(n_tracks):
+        kf = filterpy_tracker(boxes[0, t])
+        x, P = kf.x[:, 0].copy(), KalmanBoxTracker.P0.copy()
+        for frame in range(1, n_frames):
+            z = convert_bbox_to_z(boxes[frame, t])
+            start = time.perf_counter()
+            if (kf.x[6] + kf.x[2]) <= 0:
+                kf.x[6] *= 0.0
+            kf.predict()
+            if observed[frame, t]:
+                kf.update(z)
+            filterpy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            if (x[6] + x[2]) <= 0:
+                x[6] *= 0.0
+            x, P = kalman_predict(x, P, Q)
+            if observed[frame, t]:
+                x, P = kalman_update(x, P, z[:, 0], R)
+            core_time += time.perf_counter() - start
+
+            worst_x = max(worst_x, np.abs(kf.x[:, 0] - x).max() / np.abs(x).max())
+            worst_P = max(worst_P, np.abs(kf.P - P).max() / np.abs(P).max())
+    steps = n_tracks * (n_frames - 1)
+    return worst_x, worst_P, filterpy_time / steps, core_time / steps
+
+
+def skip_check(n_objects=5, n_frames=30, detect_every=3, batched=True):
+    """Return the frames on which Sort loses tracks when detection frames are skipped.
+
+    Steady objects are tracked with update on every detect_every-th frame and
+    predict in between, as kalman.py --detect_every does. Every frame must return
+    all n_objects tracks with the ids of the first frame; the 1-based numbers of the
+    frames that do not are returned.
+    """
+    frames = synthetic_frames(n_objects, n_frames)
+    tracker = Sort(batched=batched)
+    ids = None
+    broken = []
+    for frame, dets in enumerate(frames, 1):
+        if (frame - 1) % detect_every == 0:
+            ret = tracker.update(dets)
+        else:
+            ret = tracker.predict()
+        if ids is None:
+            ids = set(ret[:, 4])
+        if len(ret) != n_objects or set(ret[:, 4]) != ids:
+            broken.append(frame)
+    return broken
+
+
+# lowest affinity of a match in affinity_check; 0.05 is the 95 % gate of mahalanobis
+AFFINITY_THRESHOLDS = {
+    "iou": 0.3,
+    "giou": 0.0,
+    "diou": 0.0,
+    "center": 0.5,
+    "mahalanobis": 0.05,
+}
+
+
+def affinity_check(
+    n_objects=30, n_frames=200, detect_every=1, thresholds=AFFINITY_THRESHOLDS, **scene
+):
+    """Return the track ids and the recall Sort reaches with every affinity.
+
+    A synthetic_scene of n_objects, generated with the scene arguments, is tracked
+    with update on every detect_every-th frame and predict in between. The recall
+    is the fraction of true boxes covered by an output box with an IOU of 0.5 or
+    more; an affinity that cannot match real detections keeps creating ids and
+    covers almost none.
+    """
+    frames, truth = synthetic_scene(n_objects, n_frames, **scene)
+    results = {}
+    for name, threshold in thresholds.items():
+        tracker = Sort(iou_threshold=threshold, affinity=name)
+        ids = set()
+        covered = 0
+        for frame, (dets, boxes) in enumerate(zip(frames, truth), 1):
+            if (frame - 1) % detect_every == 0:
+                ret = tracker.update(dets)
+            else:
+                ret = tracker.predict()
+            ids.update(ret[:, 4])
+            if len(ret):
+                covered += int((iou_batch(boxes, ret).max(axis=1) >= 0.5).sum())
+        results[name] = (len(ids), covered / float(truth.shape[0] * truth.shape[1]))
+    return results
+
+
+# seconds a fresh interpreter may take to import the tracker, NumPy included
+IMPORT_TIME_TARGET = 0.15
+
+
+def import_time(module="sort", repeats=5):
+    """Return the median seconds a fresh interpreter takes to import module."""
+    code = (
+        "import time; start = time.perf_counter(); import %s; "
+        "print(time.perf_counter() - start)" % module
+    )
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            check=True,
+        )
+        runs.append(float(result.stdout))
+    return float(np.median(runs))
+
+
+def time_update(frames, warmup=5, **sort_args):
+    """Return the mean Sort.update time in seconds once all tracks are confirmed."""
+    tracker = Sort(**sort_args)
+    for dets in frames[:warmup]:
+        tracker.update(dets)
+    start = time.perf_counter()
+    for dets in frames[warmup:]:
+        tracker.update(dets)
+    return (time.perf_counter() - start) / (len(frames) - warmup)
+
+
+class FilterpyBoxTracker(object):
+    """The filterpy track SORT kept before KalmanBoxTracker, for track_memory.
+
+    It holds the configured filter of filterpy_tracker, the counters and the
+    history of predicted boxes, which grows on every predict until an update.
+    """
+
+    def __init__(self, bbox, track_id):
+        """Create the track from its first box."""
+        self.kf = filterpy_tracker(bbox)
+        self.time_since_update = 0
+        self.id = track_id
+        self.history = []
+        self.hits = 0
+        self.hit_streak = 0
+        self.age = 0
+
+    def predict(self):
+        """Advance the filter and return the predicted box, as SORT used to."""
+        if (self.kf.x[6] + self.kf.x[2]) <= 0:
+            self.kf.x[6] *= 0.0
+        self.kf.predict()
+        self.age += 1
+        if self.time_since_update > 0:
+            self.hit_streak = 0
+        self.time_since_update += 1
+        self.history.append(convert_x_to_bbox(self.kf.x))
+        return self.history[-1]
+
+
+def filterpy_tracks(boxes):
+    """Create one FilterpyBoxTracker per box, as SORT did before KalmanBoxTracker."""
+    trackers = [FilterpyBoxTracker(box, i) for i, box in enumerate(boxes)]
+    return trackers, lambda: [trk.predict() for trk in trackers]
+
+
+def object_tracks(boxes):
+    """Create one KalmanBoxTracker per box."""
+    trackers = [KalmanBoxTracker(box, i) for i, box in enumerate(boxes)]
+    return trackers, lambda: [trk.predict() for trk in trackers]
+
+
+def bank_tracks(boxes):
+    """Create a KalmanBoxTrackerBank holding one track per box."""
+    bank = KalmanBoxTrackerBank()
+    bank.add(boxes, np.arange(len(boxes)))
+    return bank, bank.predict
+
+
+MEMORY_CASES = {
+    "filterpy": filterpy_tracks,
+    "objects": object_tracks,
+    "bank": bank_tracks,
+}
+
+
+def track_memory(make_tracks, n_tracks, coast=30):
+    """Return the bytes held per track after creating n_tracks and coasting them.
+
+    make_tracks is one of MEMORY_CASES; the tracks are predicted coast times without
+    an update, as unmatched tracks are until max_age.
+    """
+    boxes = synthetic_frames(n_tracks, 1)[0]
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    tracks, predict = make_tracks(boxes)
+    for _ in range(coast):
+        predict()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del tracks
+    return used / n_tracks
+
+
+def parse_args():
+    """Parse input arguments."""
+    parser = argparse.ArgumentParser(description="SORT per-frame micro-benchmark")
+    parser.add_argument(
+        "--tracks",
+        help="Number of concurrent tracks to benchmark.",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+    )
+    parser.add_argument(
+        "--frames", help="Frames to time per run.", type=int, default=50
+    )
+    parser.add_argument(
+        "--memory",
+        help="Measure the bytes per track instead of the update time [False]",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--coast", help="Predictions without update in --memory.", type=int, default=30
+    )
+    parser.add_argument(
+        "--import_time",
+        help="Measure the cold import time of sort against IMPORT_TIME_TARGET [False]",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--skip_check",
+        help="Check that Sort.predict on skipped frames keeps every track [False]",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--affinity_check",
+        help="Compare the ids and recall of every affinity on a scene of the first "
+        "--tracks objects, failing below 90%% of the IOU recall [False]",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--detect_every",
+        help="Detection frames in --affinity_check, predict runs in between.",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--kalman_check",
+        help="Compare the Kalman core of sort with filterpy, which must be installed "
+        "[False]",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--suite",
+        help="Time every tracker component on synthetic scenes of --tracks objects "
+        "[False]",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--components",
+        help="Components timed by --suite.",
+        nargs="+",
+        choices=list(SUITE),
+        default=None,
+    )
+    parser.add_argument(
+        "--repeats",
+        help="Runs per measurement, the median is kept.",
+        type=int,
+        default=5,
+    )
+    parser.add_argument(
+        "--density",
+        help="Fraction of the scene covered by boxes.",
+        type=float,
+        default=0.05,
+    )
+    parser.add_argument(
+        "--speed",
+        help="Mean object speed in pixels per frame.",
+        type=float,
+        default=2.0,
+    )
+    parser.add_argument(
+        "--noise", help="Detection noise in pixels.", type=float, default=1.0
+    )
+    parser.add_argument(
+        "--miss_rate",
+        help="Probability of missing a detection.",
+        type=float,
+        default=0.05,
+    )
+    parser.add_argument(
+        "--false_positives",
+        help="Spurious detections per frame as a fraction of the objects.",
+        type=float,
+        default=0.02,
+    )
+    parser.add_argument("--seed", help="Scene random seed.", type=int, default=0)
+    parser.add_argument("--json", help="Write the --suite results to this file.")
+    parser.add_argument(
+        "--compare", help="Compare the --suite results with this saved JSON file."
+    )
+    parser.add_argument(
+        "--tolerance",
+        help="Slowdown over --compare reported as a regression.",
+        type=float,
+        default=0.1,
+    )
+    args = parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.import_time:
+        seconds = import_time("sort", args.repeats)
+        print(
+            "import sort: %.1f ms, target %.1f ms"
+            % (seconds * 1e3, IMPORT_TIME_TARGET * 1e3)
+        )
+        exit(0 if seconds <= IMPORT_TIME_TARGET else 1)
+    if args.skip_check:
+        failed = False
+        for batched in (True, False):
+            broken = skip_check(batched=batched)
+            failed = failed or bool(broken)
+            print(
+                "%s engine: %s"
+                % (
+                    "batched" if batched else "object",
+                    "frames %s lose tracks" % broken if broken else "unbroken output",
+                )
+            )
+        exit(1 if failed else 0)
+    if args.affinity_check:
+        results = affinity_check(
+            args.tracks[0],
+            args.frames,
+            args.detect_every,
+            density=args.density,
+            speed=args.speed,
+            noise=args.noise,
+            miss_rate=args.miss_rate,
+            false_positives=args.false_positives,
+            seed=args.seed,
+        )
+        floor = 0.9 * results["iou"][1]
+        print("%12s %9s %6s %7s" % ("affinity", "threshold", "ids", "recall"))
+        for name, (n_ids, recall) in results.items():
+            print(
+                "%12s %9g %6d %7.3f%s"
+                % (
+                    name,
+                    AFFINITY_THRESHOLDS[name],
+                    n_ids,
+                    recall,
+                    "" if recall >= floor else "  below %.3f" % floor,
+                )
+            )
+        exit(0 if min(recall for _, recall in results.values()) >= floor else 1)
+    if args.kalman_check:
+        worst_x, worst_P, filterpy_time, core_time = kalman_check()
+        print(
+            "largest relative difference: state %.2e, covariance %.2e"
+            % (worst_x, worst_P)
+        )
+        print(
+            "predict and update: filterpy %.1f us, sort %.1f us"
+            % (filterpy_time * 1e6, core_time * 1e6)
+        )
+        exit()
+    if args.suite:
+        report = run_suite(
+            args.tracks,
+            args.frames + 5,
+            args.repeats,
+            args.components,
+            density=args.density,
+            speed=args.speed,
+            noise=args.noise,
+            miss_rate=args.miss_rate,
+            false_positives=args.false_positives,
+            seed=args.seed,
+        )
+        if args.json:
+            with open(args.json, "w") as json_file:
+                json.dump(report, json_file, indent=2)
+            print("Wrote %s." % args.json)
+        if args.compare:
+            with open(args.compare) as json_file:
+                regressions = compare(report, json.load(json_file), args.tolerance)
+            if regressions:
+                print(
+                    "%d regression(s) beyond %g%%."
+                    % (len(regressions), args.tolerance * 100)
+                )
+                exit(1)
+        exit()
+    if args.memory:
+        print("%8s %10s %12s" % ("tracks", "storage", "bytes/track"))
+        for n in args.tracks:
+            for name, make_tracks in MEMORY_CASES.items():
+                used = track_memory(make_tracks, n, args.coast)
+                print("%8d %10s %12.0f" % (n, name, used))
+        exit()
+    print("%8s %16s %16s" % ("tracks", "batched ms/frame", "objects ms/frame"))
+    for n in args.tracks:
+        frames = synthetic_frames(n, args.frames + 5)
+        batched = time_update(frames, batched=True)
+        objects = time_update(frames, batched=False)
+        print("%8d %16.3f %16.3f" % (n, batched * 1e3, objects * 1e3))
@@ -1,99 +1,648 @@
 """Detect people using YOLOv3 Tiny and track them using SORT."""
 
+import argparse
+import os
+import time
+
 import cv2
 import numpy as np
-from sort import Sort
+from mot_io import MOTResultWriter
+from pipeline import DROP_POLICIES, STOP, LatencyStats, Stage, StageQueue, run_pipeline
+from sort import AFFINITIES, Sort, predict_bboxes, read_only
+
+
+def decode_yolo_outputs(outs, frame_shape, conf_threshold=0.35, class_id=0, scale=1.5):
+    """Decode YOLO output rows of one class into [x, y, w, h] boxes and confidences.
+
+    outs is the list returned by net.forward or its concatenation. Boxes are converted
+    from the normalized centre form to the pixel top-left corner and their width and
+    height scaled by scale, with the same integer truncation as int().
+    """
+    if isinstance(outs, (list, tuple)):
+        outs = np.concatenate(outs)
+    scores = outs[:, 5:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+    keep = (confidences > conf_threshold) & (class_ids == class_id)
+    outs = outs[keep]
+
+    height, width = frame_shape[:2]
+    center_x = np.trunc(outs[:, 0] * width)
+    center_y = np.trunc(outs[:, 1] * height)
+    w = np.trunc(outs[:, 2] * width)
+    h = np.trunc(outs[:, 3] * height)
+    boxes = np.empty((len(outs), 4), dtype=np.int32)
+    # Adjust bounding box from the center
+    boxes[:, 0] = np.trunc(center_x - w / 2)
+    boxes[:, 1] = np.trunc(center_y - h / 2)
+    boxes[:, 2] = np.trunc(w * scale)
+    boxes[:, 3] = np.trunc(h * scale)
+    return boxes, confidences[keep].astype(float)
+
+
+def boxes_to_dets(boxes):
+    """Convert [x, y, w, h] boxes to the [x1,y1,x2,y2,score] array of Sort.update."""
+    dets = np.empty((len(boxes), 5))
+    dets[:, :2] = boxes[:, :2]
+    dets[:, 2:4] = boxes[:, :2] + boxes[:, 2:4]
+    dets[:, 4] = 1.0
+    return dets
+
+
+def detect_people_batch(net, output_layers, frames, regions=None):
+    """Run YOLO once on a batch of frames and return the person boxes of each frame.
+
+    The frames are stacked into a single blob, so a shared network serves several
+    streams with one forward pass. Boxes kept by NMS are returned as [x, y, w, h].
+
+    regions optionally gives for every frame a (K, 4) array of [x1, y1, x2, y2] crops
+    to run the network on instead of the whole frame, or None for the whole frame.
+    The crops share the blob with the full frames and their boxes are shifted back to
+    frame coordinates before NMS, which also merges people seen by two crops.
+    """
+    # Prepare frames
+    images, owners, offsets = [], [], []
+    for f, frame in enumerate(frames):
+        if regions is None or regions[f] is None:
+            images.append(frame)
+            owners.append(f)
+            offsets.append((0, 0))
+            continue
+        for x1, y1, x2, y2 in regions[f].tolist():
+            images.append(frame[y1:y2, x1:x2])
+            owners.append(f)
+            offsets.append((x1, y1))
+    blob = cv2.dnn.blobFromImages(
+        images, 0.00392, (416, 416), (0, 0, 0), True, crop=False
+    )
+    net.setInput(blob)
+    outs = net.forward(output_layers)
+    if len(images) == 1:
+        outs = [out[np.newaxis] for out in outs]
+
+    found = [([], []) for _ in frames]
+    for b, image in enumerate(images):
+        boxes, confidences = decode_yolo_outputs([out[b] for out in outs], image.shape)
+        boxes[:, :2] += np.array(offsets[b], dtype=np.int32)
+        found[owners[b]][0].append(boxes)
+        found[owners[b]][1].append(confidences)
+
+    people = []
+    for boxes, confidences in found:
+        boxes = np.concatenate(boxes)
+        confidences = np.concatenate(confidences)
+
+        # Apply NMS
+        indexes = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
+        people.append(boxes[np.sort(np.asarray(indexes, dtype=int).reshape(-1))])
+    return people
+
+
+def detect_people(net, output_layers, frame):
+    """Run YOLO on a frame and return the person boxes kept by NMS as [x, y, w, h]."""
+    return detect_people_batch(net, output_layers, [frame])[0]
+
+
+class VideoRecorder(Stage):
+    """Thread drawing tracks on frames and writing them with cv2.VideoWriter.
+
+    Items are (stream, frame, boxes, trackers) tuples put in VideoRecorder.inbox,
+    which drops the oldest frames when writing falls behind. Several streams are
+    written to numbered files next to path.
+    """
+
+    def __init__(self, path, caps, queue_size=4):
+        """Create the recorder for the given video captures."""
+        super().__init__(
+            "record", self.write, StageQueue(queue_size, "drop_oldest"), None
+        )
+        if len(caps) == 1:
+            self.paths = [path]
+        else:
+            root, ext = os.path.splitext(path)
+            self.paths = [
+                "%s_%d%s" % (root, stream, ext) for stream in range(len(caps))
+            ]
+        self.fps = [cap.get(cv2.CAP_PROP_FPS) or 25.0 for cap in caps]
+        self.writers = [None] * len(caps)
+
+    def write(self, item):
+        """Draw and write one frame."""
+        stream, frame, boxes, trackers = item
+        if self.writers[stream] is None:
+            height, width = frame.shape[:2]
+            self.writers[stream] = cv2.VideoWriter(
+                self.paths[stream],
+                cv2.VideoWriter_fourcc(*"mp4v"),
+                self.fps[stream],
+                (width, height),
+            )
+        self.writers[stream].write(draw_tracks(frame, boxes, trackers))
+
+    def close(self):
+        """Write the queued frames and release the video files."""
+        self.inbox.put(STOP)
+        self.join()
+        for writer in self.writers:
+            if writer is not None:
+                writer.release()
+
+
+class DetectionScheduler(object):
+    """Decides on which frames of each stream the detector runs.
+
+    After every detector pass the next one is scheduled up to max_skip frames later,
+    as long as every track is expected to move by less than drift times its size in
+    the meantime according to the velocities of its Kalman state. A drift of zero
+    keeps a fixed interval of max_skip frames.
+    """
+
+    def __init__(self, n_streams, max_skip=1, drift=0.2):
+        """Schedule the detector on the first frame of every stream."""
+        self.max_skip = max_skip
+        self.drift = drift
+        self.next_index = [1] * n_streams
+        self.intervals = [1] * n_streams
+        self.frames = 0
+        self.detections = 0
+
+    def should_detect(self, stream, index):
+        """Return whether the detector runs on frame index of stream."""
+        self.frames += 1
+        if index < self.next_index[stream]:
+            return False
+        self.next_index[stream] = index + self.intervals[stream]
+        self.detections += 1
+        return True
+
+    def interval(self, mot_tracker):
+        """Return the number of frames until the next detector pass."""
+        if self.max_skip <= 1 or self.drift <= 0:
+            return max(self.max_skip, 1)
+        states = mot_tracker.get_states()
+        states = states[states[:, 2] > 0]
+        speed = np.hypot(states[:, 4], states[:, 5])
+        moving = speed > 0
+        if not moving.any():
+            return self.max_skip
+        frames = self.drift * np.sqrt(states[moving, 2]) / speed[moving]
+        return int(np.clip(np.floor(frames.min()), 1, self.max_skip))
+
+    def schedule(self, stream, mot_tracker):
+        """Update the detection interval of stream after its tracker was updated."""
+        self.intervals[stream] = self.interval(mot_tracker)
 
 
-def object_tracking():
-    """Upload a video file and use its frames to apply Yolo."""
-    # Open video capture
-    cap = cv2.VideoCapture("test.mp4")
+def roi_regions(boxes, frame_shape, margin=0.5, min_size=128):
+    """Return non-overlapping [x1, y1, x2, y2] crops of a frame covering boxes.
+
+    Every box is grown by margin times its size on each side and to at least
+    min_size pixels, clipped to the frame, and overlapping crops are merged into
+    their bounding box until none overlap.
+    """
+    height, width = frame_shape[:2]
+    centre = (boxes[:, :2] + boxes[:, 2:4]) / 2.0
+    half = np.maximum((boxes[:, 2:4] - boxes[:, :2]) * (0.5 + margin), min_size / 2.0)
+    regions = np.concatenate((centre - half, centre + half), axis=1)
+    regions = np.clip(np.round(regions), 0, [width, height, width, height]).astype(int)
+    regions = regions[(regions[:, 2] > regions[:, 0]) & (regions[:, 3] > regions[:, 1])]
+
+    merged = []
+    for region in regions:
+        overlapping = True
+        while overlapping:
+            overlapping = False
+            for m, other in enumerate(merged):
+                if (
+                    region[0] < other[2]
+                    and other[0] < region[2]
+                    and region[1] < other[3]
+                    and other[1] < region[3]
+                ):
+                    del merged[m]
+                    region = np.concatenate(
+                        (
+                            np.minimum(region[:2], other[:2]),
+                            np.maximum(region[2:], other[2:]),
+                        )
+                    )
+                    overlapping = True
+                    break
+        merged.append(region)
+    return np.array(merged, dtype=int).reshape(-1, 4)
+
+
+class RegionPlanner(object):
+    """Decides which part of each frame the detector looks at.
+
+    Every full_every-th detector pass of a stream, and whenever the stream has no
+    track, the whole frame is detected so that people entering the scene are found.
+    The other passes only crop the frame around the boxes predicted by the stream's
+    tracker, see roi_regions, so the network sees the tracked people at a higher
+    resolution. Crops beyond max_crops are merged into their bounding box, keeping
+    the cost of a pass at max_crops network inputs, and the whole frame is used
+    when the crops would cover more than max_area of it. The tracks are predicted
+    for the frame being detected, which the tracker may not have reached yet, from
+    the states the tracking stage last published, see publish.
+    """
+
+    def __init__(
+        self,
+        n_streams,
+        full_every=10,
+        margin=0.5,
+        min_size=128,
+        max_crops=1,
+        max_area=0.5,
+    ):
+        """Detect the whole frame on the first pass of every stream."""
+        if max_crops < 1:
+            raise ValueError("max_crops must be at least 1, got %d" % max_crops)
+        self.full_every = full_every
+        self.margin = margin
+        self.min_size = min_size
+        self.max_crops = max_crops
+        self.max_area = max_area
+        self.passes = [0] * n_streams
+        # (frame_count, read-only Kalman states) of every tracker
+        self.tracks = [(0, read_only(np.empty((0, 7))))] * n_streams
+        self.full = 0
+        self.crops = 0
+
+    def publish(self, stream, mot_tracker):
+        """Keep a copy of the tracks of stream for the inference thread.
+
+        The tracking stage calls it after advancing the tracker, which it keeps
+        modifying in place while regions runs.
+        """
+        states = read_only(np.array(mot_tracker.get_states()))
+        self.tracks[stream] = (mot_tracker.frame_count, states)
+
+    def regions(self, stream, index, frame_shape):
+        """Return the (K, 4) crops to detect on frame index, or None for all of it."""
+        first = self.passes[stream] % max(self.full_every, 1) == 0
+        self.passes[stream] += 1
+        if not first:
+            frame_count, states = self.tracks[stream]
+            regions = roi_regions(
+                predict_bboxes(states, max(index - frame_count, 1)),
+                frame_shape,
+                self.margin,
+                self.min_size,
+            )
+            if len(regions) > self.max_crops:
+                regions = np.concatenate(
+                    (regions[:, :2].min(axis=0), regions[:, 2:].max(axis=0))
+                )[np.newaxis]
+            area = np.prod(regions[:, 2:] - regions[:, :2], axis=1).sum()
+            if 0 < len(regions) and area <= self.max_area * np.prod(frame_shape[:2]):
+                self.crops += len(regions)
+                return regions
+        self.full += 1
+        return None
+
+
+def draw_tracks(frame, boxes, trackers):
+    """Draw the detected boxes and the tracked boxes on frame."""
+    # Draw bounding boxes
+    for x, y, w, h in boxes.tolist():
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
+        cv2.putText(
+            frame,
+            "Personita",
+            (x, y - 10),
+            cv2.FONT_HERSHEY_PLAIN,
+            2,
+            (0, 0, 255),
+            thickness=2,
+        )
+
+    # Draw trackin g results
+    for d in trackers:
+        x1, y1, x2, y2, track_id = map(int, d)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 3)
+    return frame
+
+
+def object_tracking(
+    videos=("test.mp4",),
+    queue_size=4,
+    drop_policy="block",
+    report_latency=True,
+    headless=False,
+    output_dir=None,
+    output_format="txt",
+    render_every=1,
+    record=None,
+    detect_every=1,
+    motion_drift=0.2,
+    roi_full_every=1,
+    roi_margin=0.5,
+    roi_max_crops=1,
+    affinity="iou",
+    affinity_threshold=0.3,
+):
+    """Upload video files and use their frames to apply Yolo.
+
+    Capture, inference and tracking run in their own threads connected by bounded
+    queues, drawing and display stay on the main thread. With several videos, one
+    frame of each is read per step and the batch goes through the network at once;
+    every stream keeps its own SORT tracker.
+
+    headless skips drawing and cv2.imshow. output_dir receives the tracks of each
+    stream as MOT records, written by the tracking stage so that no tracked frame
+    is lost when display drops frames. Only every render_every-th frame is drawn,
+    and record writes every annotated frame to a video from a separate thread that
+    drops frames instead of slowing down tracking.
+
+    With detect_every above 1 the detector is skipped on some frames and the tracks
+    are extrapolated by their Kalman filters, see DetectionScheduler.
+
+    With roi_full_every above 1 only every roi_full_every-th detector pass sees the
+    whole frame, the others run on crops around the predicted tracks, see
+    RegionPlanner.
+
+    affinity selects how detections are matched to tracks, see sort.AFFINITIES, with
+    affinity_threshold as the lowest score of a match.
+    """
+    # Open video captures
+    caps = [cv2.VideoCapture(video) for video in videos]
 
     # Load YOLOv3 Tiny
     net = cv2.dnn.readNet("yolov3-tiny.weights", "yolov3-tiny.cfg")
     output_layers = net.getUnconnectedOutLayersNames()
 
-    # Initialize SORT tracker
-    mot_tracker = Sort()
+    # Initialize one SORT tracker per stream
+    mot_trackers = [
+        Sort(iou_threshold=affinity_threshold, affinity=affinity) for _ in caps
+    ]
+    # Last frame index every tracker has been advanced to
+    tracked = [0] * len(caps)
+    scheduler = DetectionScheduler(len(caps), detect_every, motion_drift)
+    planner = None
+    if roi_full_every > 1:
+        planner = RegionPlanner(
+            len(caps), roi_full_every, roi_margin, max_crops=roi_max_crops
+        )
+    end_to_end = LatencyStats("end-to-end")
+    n_frames = 0
+
+    writers = []
+    if output_dir is not None:
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        for stream in range(len(caps)):
+            out_fn = os.path.join(output_dir, "stream%d.%s" % (stream, output_format))
+            writers.append(MOTResultWriter(out_fn, binary=output_format == "npy"))
 
-    while True:
-        # Read frame from video
-        ret, frame = cap.read()
-        if not ret:
-            break
+    recorder = None
+    if record is not None:
+        recorder = VideoRecorder(record, caps, queue_size)
+        recorder.start()
 
-        # Prepare frames
-        blob = cv2.dnn.blobFromImage(
-            frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False
+    def capture():
+        active = list(range(len(caps)))
+        indices = [0] * len(caps)
+        while active:
+            # Read one frame from every video still running
+            frames = []
+            for stream in list(active):
+                ret, frame = caps[stream].read()
+                if ret:
+                    frames.append(frame)
+                    indices[stream] += 1
+                else:
+                    active.remove(stream)
+            if frames:
+                yield {
+                    "streams": list(active),
+                    "indices": [indices[stream] for stream in active],
+                    "frames": frames,
+                    "captured": time.perf_counter(),
+                }
+
+    def inference(packet):
+        detected = [
+            scheduler.should_detect(stream, index)
+            for stream, index in zip(packet["streams"], packet["indices"])
+        ]
+        streams = [stream for stream, d in zip(packet["streams"], detected) if d]
+        indices = [index for index, d in zip(packet["indices"], detected) if d]
+        frames = [frame for frame, d in zip(packet["frames"], detected) if d]
+        regions = None
+        if planner is not None:
+            regions = [
+                planner.regions(stream, index, frame.shape)
+                for stream, index, frame in zip(streams, indices, frames)
+            ]
+        people = iter(
+            detect_people_batch(net, output_layers, frames, regions) if frames else []
         )
-        net.setInput(blob)
-        outs = net.forward(output_layers)
-
-        # Prepare thresholds, class IDs and bounding boxes
-        class_ids = []
-        confidences = []
-        boxes = []
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                if confidence > 0.35 and class_id == 0:  # Person class
-                    center_x = int(detection[0] * frame.shape[1])
-                    center_y = int(detection[1] * frame.shape[0])
-                    w = int(detection[2] * frame.shape[1])
-                    h = int(detection[3] * frame.shape[0])
-                    # Adjust bounding box from the center
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-                    w = int(w * 1.5)
-                    h = int(h * 1.5)
-                    boxes.append([x, y, w, h])
-                    confidences.append(float(confidence))
-                    class_ids.append(class_id)
+        packet["detected"] = detected
+        packet["boxes"] = [
+            next(people) if d else np.empty((0, 4), dtype=np.int32) for d in detected
+        ]
+        return packet
 
-        # Apply NMS
-        indexes = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
+    def tracking(packet):
+        packet["trackers"] = []
+        for stream, index, detected, boxes in zip(
+            packet["streams"], packet["indices"], packet["detected"], packet["boxes"]
+        ):
+            # Frames dropped before inference still advance the constant velocity
+            # model, one step each
+            for skipped in range(tracked[stream] + 1, index):
+                trackers = mot_trackers[stream].predict()
+                if writers:
+                    writers[stream].write(skipped, trackers)
+            tracked[stream] = index
+            if detected:
+                trackers = mot_trackers[stream].update(boxes_to_dets(boxes))
+                scheduler.schedule(stream, mot_trackers[stream])
+            else:
+                # Kalman-only interpolation between detector passes
+                trackers = mot_trackers[stream].predict()
+            if planner is not None:
+                planner.publish(stream, mot_trackers[stream])
+            # Records are written here since display may drop frames
+            if writers:
+                writers[stream].write(index, trackers)
+            packet["trackers"].append(trackers)
+        return packet
 
-        dets = []
-
-        # Draw bounding boxes
-        for i in range(len(boxes)):
-            if i in indexes:
-                x, y, w, h = boxes[i]
-                dets.append([x, y, x + w, y + h, 1.0])
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
-                cv2.putText(
-                    frame,
-                    "Personita",
-                    (x, y - 10),
-                    cv2.FONT_HERSHEY_PLAIN,
-                    2,
-                    (0, 0, 255),
-                    thickness=2,
-                )
-
-        trackers = mot_tracker.update(np.array(dets))
-
-        # Draw trackin g results
-        for d in trackers:
-            x1, y1, x2, y2, track_id = map(int, d)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 3)
-
-        # Display frame with tracking information
-        cv2.imshow("view", frame)
+    def display(packet):
+        nonlocal n_frames
+        n_frames += len(packet["frames"])
+        streams = zip(
+            packet["streams"],
+            packet["indices"],
+            packet["frames"],
+            packet["boxes"],
+            packet["trackers"],
+        )
+        for stream, index, frame, boxes, trackers in streams:
+            if recorder is not None:
+                # The recorder draws on its own copy while this thread draws below
+                recorded = frame if headless else frame.copy()
+                recorder.inbox.put((stream, recorded, boxes, trackers))
+            if index % render_every != 0:
+                continue
+            if not headless:
+                # Display frame with tracking information
+                draw_tracks(frame, boxes, trackers)
+                cv2.imshow("view" if len(caps) == 1 else "view %d" % stream, frame)
+        end_to_end.record(time.perf_counter() - packet["captured"])
 
         # Check for Esc key
+        if headless:
+            return True
         key = cv2.waitKey(1)
-        if key == 27:
-            break
+        return key != 27
+
+    start = time.perf_counter()
+    stats, queues = run_pipeline(
+        capture,
+        [("inference", inference), ("tracking", tracking)],
+        display,
+        queue_size=queue_size,
+        policy=drop_policy,
+    )
+    elapsed = time.perf_counter() - start
 
     # Close windows and program
-    cap.release()
-    cv2.destroyAllWindows()
+    for cap in caps:
+        cap.release()
+    for writer in writers:
+        writer.close()
+    if recorder is not None:
+        recorder.close()
+        stats.append(recorder.stats)
+    if not headless:
+        cv2.destroyAllWindows()
+
+    if report_latency:
+        for stage_stats in stats + [end_to_end]:
+            print(stage_stats.report())
+        dropped = sum(q.dropped for q in queues)
+        print("Dropped %d batches." % dropped)
+        if recorder is not None:
+            print("Dropped %d recorded frames." % recorder.inbox.dropped)
+        print(
+            "Ran the detector on %d of %d frames."
+            % (scheduler.detections, scheduler.frames)
+        )
+        if planner is not None:
+            print(
+                "Detected %d whole frames and %d crops." % (planner.full, planner.crops)
+            )
+        print(
+            "Tracked %d frames from %d streams in %.2f seconds or %.1f FPS"
+            % (n_frames, len(caps), elapsed, n_frames / elapsed)
+        )
+
+
+def parse_args():
+    """Parse input arguments."""
+    parser = argparse.ArgumentParser(description="YOLOv3 Tiny + SORT people tracker")
+    parser.add_argument(
+        "--video",
+        help="Video files or camera URLs to track, batched through one network.",
+        nargs="+",
+        default=["test.mp4"],
+    )
+    parser.add_argument(
+        "--queue_size", help="Frames buffered between stages.", type=int, default=4
+    )
+    parser.add_argument(
+        "--drop_policy",
+        help="What to do with new frames when a stage falls behind.",
+        choices=DROP_POLICIES,
+        default="block",
+    )
+    parser.add_argument(
+        "--headless",
+        help="Track without drawing or opening a window [False]",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--output_dir", help="Directory for the per-stream track records.", default=None
+    )
+    parser.add_argument(
+        "--output_format",
+        help="Track records as MOT text or float64 .npy rows.",
+        choices=["txt", "npy"],
+        default="txt",
+    )
+    parser.add_argument(
+        "--render_every", help="Draw only every Nth frame.", type=int, default=1
+    )
+    parser.add_argument(
+        "--record", help="Write the annotated frames to this video file.", default=None
+    )
+    parser.add_argument(
+        "--detect_every",
+        help="Run the detector at most every K frames, Kalman prediction in between.",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--motion_drift",
+        help="Fraction of its size a track may drift before the next detection "
+        "(0 for a fixed interval).",
+        type=float,
+        default=0.2,
+    )
+    parser.add_argument(
+        "--roi_full_every",
+        help="Detect the whole frame every Nth detector pass and crops around the "
+        "predicted tracks in between (1 for whole frames only).",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--roi_margin",
+        help="Crop margin around a predicted track, as a fraction of its size.",
+        type=float,
+        default=0.5,
+    )
+    parser.add_argument(
+        "--roi_max_crops",
+        help="Crops per frame before they are merged into one.",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--affinity",
+        help="Score matching detections to tracks.",
+        choices=list(AFFINITIES),
+        default="iou",
+    )
+    parser.add_argument(
+        "--affinity_threshold",
+        help="Lowest affinity of a match.",
+        type=float,
+        default=0.3,
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
     """Begin program."""
-    object_tracking()
+    args = parse_args()
+    object_tracking(
+        args.video,
+        args.queue_size,
+        args.drop_policy,
+        headless=args.headless,
+        output_dir=args.output_dir,
+        output_format=args.output_format,
+        render_every=args.render_every,
+        record=args.record,
+        detect_every=args.detect_every,
+        motion_drift=args.motion_drift,
+        roi_full_every=args.roi_full_every,
+        roi_margin=args.roi_margin,
+        roi_max_crops=args.roi_max_crops,
+        affinity=args.affinity,
+        affinity_threshold=args.affinity_threshold,
+    )
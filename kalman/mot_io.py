@@ -0,0 +1,139 @@
+"""Read and write MOT Challenge files for the SORT command line tools."""
+
+import os
+import shutil
+import sys
+
+import numpy as np
+
+
+def load_detections(det_fn, cache=True):
+    """Load a MOT det.txt file as an array sorted by frame number.
+
+    The parsed array is cached as a .npy file next to det_fn and reused while it is
+    newer than the text file, so repeated runs skip np.loadtxt.
+    """
+    cache_fn = os.path.splitext(det_fn)[0] + ".npy"
+    if (
+        cache
+        and os.path.exists(cache_fn)
+        and os.path.getmtime(cache_fn) >= os.path.getmtime(det_fn)
+    ):
+        return np.load(cache_fn)
+
+    seq_dets = np.loadtxt(det_fn, delimiter=",", ndmin=2)
+    seq_dets = seq_dets[np.argsort(seq_dets[:, 0], kind="stable")]
+    if cache:
+        try:
+            np.save(cache_fn, seq_dets)
+        except OSError:
+            pass  # read-only dataset, parse again next time
+    return seq_dets
+
+
+def iter_frames(seq_dets):
+    """Yield (frame, dets) for every frame from 1 to the last one in seq_dets.
+
+    seq_dets must be sorted by frame, as returned by load_detections. Boxes are
+    converted once from [x1,y1,w,h,score] to [x1,y1,x2,y2,score] and each dets is a
+    view into that array, located through per-frame offsets instead of a scan.
+    """
+    dets = np.ascontiguousarray(seq_dets[:, 2:7])
+    dets[:, 2:4] += dets[:, 0:2]
+    n_frames = int(seq_dets[:, 0].max()) if len(seq_dets) else 0
+    offsets = np.searchsorted(seq_dets[:, 0], np.arange(1, n_frames + 2), side="left")
+    for frame in range(1, n_frames + 1):
+        yield frame, dets[offsets[frame - 1] : offsets[frame]]
+
+
+MOT_ROW = "%d,%d,%.2f,%.2f,%.2f,%.2f,1,-1,-1,-1\n"
+
+
+def format_mot_rows(rows):
+    """Format (N, 6) [frame,id,x,y,w,h] rows as MOT Challenge text in one call."""
+    return (MOT_ROW * len(rows)) % tuple(rows.ravel().tolist())
+
+
+class MOTResultWriter(object):
+    """Buffered writer for tracker output in MOT Challenge text or .npy format.
+
+    Each frame's Sort.update output is stored in memory as [frame,id,x,y,w,h] rows and
+    written once chunk_rows rows are buffered, so memory stays bounded on any sequence
+    length. The .npy format stores the same rows as float64, see npy_to_mot_text.
+    """
+
+    def __init__(self, fn, binary=False, chunk_rows=65536):
+        """Open fn for writing."""
+        self.fn = fn
+        self.binary = binary
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._chunk = []
+        self._chunk_rows = 0
+        if binary:
+            self._file = open(fn + ".part", "wb")
+        else:
+            self._file = open(fn, "w")
+
+    def write(self, frame, trackers):
+        """Buffer the [x1,y1,x2,y2,id] trackers array of one frame."""
+        rows = np.empty((len(trackers), 6))
+        rows[:, 0] = frame
+        rows[:, 1] = trackers[:, 4]
+        rows[:, 2:4] = trackers[:, 0:2]
+        rows[:, 4:6] = trackers[:, 2:4] - trackers[:, 0:2]
+        self._chunk.append(rows)
+        self._chunk_rows += len(rows)
+        if self._chunk_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows."""
+        if self._chunk_rows == 0:
+            return
+        chunk = np.concatenate(self._chunk)
+        if self.binary:
+            self._file.write(chunk.astype("<f8").tobytes())
+        else:
+            self._file.write(format_mot_rows(chunk))
+        self.rows += len(chunk)
+        self._chunk = []
+        self._chunk_rows = 0
+
+    def close(self):
+        """Flush and close the file, adding the .npy header in binary mode."""
+        self.flush()
+        self._file.close()
+        if self.binary:
+            header = {"descr": "<f8", "fortran_order": False, "shape": (self.rows, 6)}
+            with open(self.fn, "wb") as out, open(self.fn + ".part", "rb") as raw:
+                np.lib.format.write_array_header_1_0(out, header)
+                shutil.copyfileobj(raw, out)
+            os.remove(self.fn + ".part")
+
+    def __enter__(self):
+        """Use the writer as a context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the writer."""
+        self.close()
+
+
+def npy_to_mot_text(npy_fn, txt_fn=None, chunk_rows=65536):
+    """Convert a .npy file from MOTResultWriter back to MOT Challenge text."""
+    if txt_fn is None:
+        txt_fn = os.path.splitext(npy_fn)[0] + ".txt"
+    rows = np.load(npy_fn, mmap_mode="r")
+    with open(txt_fn, "w") as out_file:
+        for start in range(0, len(rows), chunk_rows):
+            out_file.write(
+                format_mot_rows(np.asarray(rows[start : start + chunk_rows]))
+            )
+    return txt_fn
+
+
+if __name__ == "__main__":
+    """Convert .npy tracker output given on the command line to MOT text."""
+    for npy_fn in sys.argv[1:]:
+        print("Wrote %s." % npy_to_mot_text(npy_fn))
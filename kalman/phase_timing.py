@@ -0,0 +1,104 @@
+"""Opt-in per-phase latency histograms for the SORT tracker."""
+
+import math
+import time
+
+import numpy as np
+
+# histogram buckets per doubling of the duration, about 9 % wide
+BINS_PER_OCTAVE = 8
+# up to 2**40 ns, about 18 minutes
+N_BINS = 40 * BINS_PER_OCTAVE
+
+
+class PhaseProfiler(object):
+    """Histograms of the time spent in each phase of Sort.update.
+
+    Sort.update calls start() and then lap(phase) after every phase, so a phase lasts
+    from the previous lap; stop(phase) records the whole span since start(). Durations
+    are measured with time.perf_counter_ns and counted in log-spaced buckets, so
+    memory stays constant however many frames are tracked and percentiles are exact
+    to the width of a bucket.
+    """
+
+    def __init__(self, phases=()):
+        """Create empty histograms, reported in the order of phases when given."""
+        self.counts = {phase: np.zeros(N_BINS, dtype=np.int64) for phase in phases}
+        self.totals = dict.fromkeys(phases, 0)
+        self._start = 0
+        self._last = 0
+
+    def start(self):
+        """Start timing a call."""
+        self._start = self._last = time.perf_counter_ns()
+
+    def lap(self, phase):
+        """Record the time since the previous lap or start() under phase."""
+        now = time.perf_counter_ns()
+        self.record(phase, now - self._last)
+        self._last = now
+
+    def stop(self, phase):
+        """Record the time since start() under phase."""
+        self._last = time.perf_counter_ns()
+        self.record(phase, self._last - self._start)
+
+    def record(self, phase, ns):
+        """Add one duration in nanoseconds to the histogram of phase."""
+        counts = self.counts.get(phase)
+        if counts is None:
+            counts = self.counts[phase] = np.zeros(N_BINS, dtype=np.int64)
+            self.totals[phase] = 0
+        bucket = int(math.log2(ns) * BINS_PER_OCTAVE) if ns > 1 else 0
+        counts[min(bucket, N_BINS - 1)] += 1
+        self.totals[phase] += ns
+
+    def merge(self, other):
+        """Add the histograms of another profiler to this one."""
+        for phase, counts in other.counts.items():
+            if phase not in self.counts:
+                self.counts[phase] = np.zeros(N_BINS, dtype=np.int64)
+                self.totals[phase] = 0
+            self.counts[phase] += counts
+            self.totals[phase] += other.totals[phase]
+
+    def percentile(self, phase, q):
+        """Return the q-th percentile of phase in nanoseconds, at bucket resolution."""
+        counts = self.counts[phase]
+        rank = math.ceil(q / 100.0 * counts.sum())
+        bucket = int(np.searchsorted(np.cumsum(counts), max(rank, 1)))
+        # geometric centre of the bucket
+        return 2.0 ** ((bucket + 0.5) / BINS_PER_OCTAVE)
+
+    def summary(self, percentiles=(50, 95, 99)):
+        """Return {phase: {"count", "mean", "p50", ...}} with times in nanoseconds."""
+        summary = {}
+        for phase, counts in self.counts.items():
+            count = int(counts.sum())
+            if count == 0:
+                continue
+            row = {"count": count, "mean": self.totals[phase] / count}
+            for q in percentiles:
+                row["p%g" % q] = self.percentile(phase, q)
+            summary[phase] = row
+        return summary
+
+    def report(self, title=""):
+        """Return a table of the calls, mean and p50/p95/p99 of every phase in us."""
+        lines = [
+            "%-12s %8s %9s %9s %9s %9s"
+            % (title, "calls", "mean us", "p50 us", "p95 us", "p99 us")
+        ]
+        for phase, row in self.summary().items():
+            lines.append(
+                "%-12s %8d %9.1f %9.1f %9.1f %9.1f"
+                % (
+                    phase,
+                    row["count"],
+                    row["mean"] / 1e3,
+                    row["p50"] / 1e3,
+                    row["p95"] / 1e3,
+                    row["p99"] / 1e3,
+                )
+            )
+        return "\n".join(lines)
@@ -0,0 +1,167 @@
+"""Run the stages of the people tracker concurrently on bounded queues."""
+
+import queue
+import threading
+import time
+
+DROP_POLICIES = ["block", "drop_oldest", "drop_newest"]
+
+# Marks the end of the stream, it is never dropped
+STOP = object()
+
+
+class StageQueue(object):
+    """Bounded queue between two stages.
+
+    When the consumer falls behind, "block" makes the producer wait, "drop_oldest"
+    discards the oldest queued item and "drop_newest" discards the incoming one.
+    """
+
+    def __init__(self, maxsize=4, policy="block"):
+        """Create the queue."""
+        if policy not in DROP_POLICIES:
+            raise ValueError("Unknown drop policy %r" % policy)
+        self.policy = policy
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, item):
+        """Add an item following the drop policy."""
+        if item is STOP or self.policy == "block":
+            self._queue.put(item)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def get(self):
+        """Remove and return the next item, waiting for one if needed."""
+        return self._queue.get()
+
+
+class LatencyStats(object):
+    """Running count, mean and maximum of the time spent per item."""
+
+    def __init__(self, name):
+        """Create empty statistics."""
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed):
+        """Add the time in seconds spent on one item."""
+        self.count += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def report(self):
+        """Return a one line summary."""
+        mean = self.total_time / self.count if self.count else 0.0
+        return "%-10s %6d items, mean %7.2f ms, max %7.2f ms" % (
+            self.name,
+            self.count,
+            mean * 1e3,
+            self.max_time * 1e3,
+        )
+
+
+class Stage(threading.Thread):
+    """Thread applying func to every item of inbox and passing the result to outbox.
+
+    With inbox set to None, func is called without arguments and must return an
+    iterable, the stage then acts as the source of the pipeline. Items for which func
+    returns None, or all items when outbox is None, are not passed on.
+    """
+
+    def __init__(self, name, func, inbox, outbox, stop_event=None):
+        """Create the stage, it starts with Stage.start()."""
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop_event = stop_event or threading.Event()
+        self.stats = LatencyStats(name)
+        self.error = None
+
+    def run(self):
+        """Process items until the end of the stream."""
+        try:
+            if self.inbox is None:
+                items = iter(self.func())
+                while not self.stop_event.is_set():
+                    start = time.perf_counter()
+                    item = next(items, STOP)
+                    if item is STOP:
+                        break
+                    self.stats.record(time.perf_counter() - start)
+                    self.outbox.put(item)
+            else:
+                while True:
+                    item = self.inbox.get()
+                    if item is STOP:
+                        break
+                    start = time.perf_counter()
+                    result = self.func(item)
+                    self.stats.record(time.perf_counter() - start)
+                    if result is not None and self.outbox is not None:
+                        self.outbox.put(result)
+        except Exception as e:
+            # stop the source and let the stages downstream finish
+            self.error = e
+            self.stop_event.set()
+            if self.inbox is not None:
+                while self.inbox.get() is not STOP:
+                    pass
+        finally:
+            if self.outbox is not None:
+                self.outbox.put(STOP)
+
+
+def run_pipeline(source, stages, sink, queue_size=4, policy="block"):
+    """Run source and stages in threads and call sink on every output item.
+
+    source is a generator function, stages a list of (name, func) pairs and sink is
+    called on the calling thread (cv2.imshow needs it); when sink returns False the
+    source stops and the remaining items are drained. policy applies to the queues
+    after the source and before the sink. Returns the LatencyStats of
+    every stage, the sink last, and the StageQueues between them.
+    """
+    stop_event = threading.Event()
+    # frames may only be dropped before inference and before display, never between
+    # inference and tracking
+    queues = [StageQueue(queue_size, policy)]
+    queues += [StageQueue(queue_size) for _ in range(len(stages) - 1)]
+    queues += [StageQueue(queue_size, policy)]
+    threads = [Stage("capture", source, None, queues[0], stop_event)]
+    for (name, func), inbox, outbox in zip(stages, queues[:-1], queues[1:]):
+        threads.append(Stage(name, func, inbox, outbox, stop_event))
+    for thread in threads:
+        thread.start()
+
+    sink_stats = LatencyStats("display")
+    while True:
+        item = queues[-1].get()
+        if item is STOP:
+            break
+        if stop_event.is_set():
+            continue
+        start = time.perf_counter()
+        if sink(item) is False:
+            stop_event.set()
+        sink_stats.record(time.perf_counter() - start)
+    for thread in threads:
+        thread.join()
+        if thread.error is not None:
+            raise thread.error
+    return [thread.stats for thread in threads] + [sink_stats], queues
@@ -18,22 +18,51 @@
 
 from __future__ import print_function
 
+import argparse
+import csv
+import glob
+import itertools
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import BytesIO
+from itertools import repeat
 
-import matplotlib
 import numpy as np
+from mot_io import MOTResultWriter, iter_frames, load_detections
+from phase_timing import PhaseProfiler
 
-matplotlib.use("TkAgg")
-import argparse
-import glob
-import time
+# detections x trackers above which association switches to the sparse solver
+SPARSE_MIN_PAIRS = 256 * 256
+
+# phases timed by Sort.update, in order
+PHASES = (
+    "predict",
+    "iou",
+    "assignment",
+    "sparse",
+    "matching",
+    "correct",
+    "bookkeeping",
+    "update",
+)
 
-import matplotlib.patches as patches
-import matplotlib.pyplot as plt
-from filterpy.kalman import KalmanFilter
-from skimage import io
 
-np.random.seed(0)
+def load_display():
+    """
+    Imports matplotlib with the TkAgg backend and skimage.io, only needed by --display
+
+    Returns the pyplot, patches and skimage.io modules.
+    """
+    import matplotlib
+
+    matplotlib.use("TkAgg")
+    import matplotlib.patches as patches
+    import matplotlib.pyplot as plt
+    from skimage import io
+
+    return plt, patches, io
 
 
 def linear_assignment(cost_matrix):
@@ -71,6 +100,210 @@ def iou_batch(bb_test, bb_gt):
     return o
 
 
+def enclosing_batch(bb_test, bb_gt):
+    """
+    Returns the squared centre distance and the squared diagonal of the smallest
+      enclosing box between two sets of bboxes, broadcast as in iou_batch
+    """
+    dx = (
+        np.subtract.outer(bb_test[:, 0] + bb_test[:, 2], bb_gt[:, 0] + bb_gt[:, 2])
+        / 2.0
+    )
+    dy = (
+        np.subtract.outer(bb_test[:, 1] + bb_test[:, 3], bb_gt[:, 1] + bb_gt[:, 3])
+        / 2.0
+    )
+    bb_gt = np.expand_dims(bb_gt, 0)
+    bb_test = np.expand_dims(bb_test, 1)
+    cw = np.maximum(bb_test[..., 2], bb_gt[..., 2]) - np.minimum(
+        bb_test[..., 0], bb_gt[..., 0]
+    )
+    ch = np.maximum(bb_test[..., 3], bb_gt[..., 3]) - np.minimum(
+        bb_test[..., 1], bb_gt[..., 1]
+    )
+    return dx * dx + dy * dy, cw * cw + ch * ch
+
+
+def giou_batch(bb_test, bb_gt):
+    """
+    Computes generalized IOU between two sets of bboxes in the form [x1,y1,x2,y2]:
+      the IOU minus the part of the enclosing box not covered by either bbox, in
+      [-1, 1] and still informative when the bboxes do not overlap
+    """
+    bb_gt = np.expand_dims(bb_gt, 0)
+    bb_test = np.expand_dims(bb_test, 1)
+
+    xx1 = np.maximum(bb_test[..., 0], bb_gt[..., 0])
+    yy1 = np.maximum(bb_test[..., 1], bb_gt[..., 1])
+    xx2 = np.minimum(bb_test[..., 2], bb_gt[..., 2])
+    yy2 = np.minimum(bb_test[..., 3], bb_gt[..., 3])
+    wh = np.maximum(0.0, xx2 - xx1) * np.maximum(0.0, yy2 - yy1)
+    union = (
+        (bb_test[..., 2] - bb_test[..., 0]) * (bb_test[..., 3] - bb_test[..., 1])
+        + (bb_gt[..., 2] - bb_gt[..., 0]) * (bb_gt[..., 3] - bb_gt[..., 1])
+        - wh
+    )
+    enclosing = (
+        np.maximum(bb_test[..., 2], bb_gt[..., 2])
+        - np.minimum(bb_test[..., 0], bb_gt[..., 0])
+    ) * (
+        np.maximum(bb_test[..., 3], bb_gt[..., 3])
+        - np.minimum(bb_test[..., 1], bb_gt[..., 1])
+    )
+    return wh / union - (enclosing - union) / enclosing
+
+
+def diou_batch(bb_test, bb_gt):
+    """
+    Computes distance IOU between two sets of bboxes in the form [x1,y1,x2,y2]: the
+      IOU minus the squared centre distance over the squared diagonal of the
+      enclosing box, in [-1, 1]
+    """
+    rho2, c2 = enclosing_batch(bb_test, bb_gt)
+    return iou_batch(bb_test, bb_gt) - rho2 / c2
+
+
+def center_batch(bb_test, bb_gt):
+    """
+    Computes a centre distance affinity between two sets of bboxes in the form
+      [x1,y1,x2,y2]: one minus the centre distance over the diagonal of the
+      enclosing box, in [0, 1] and independent of any overlap
+    """
+    rho2, c2 = enclosing_batch(bb_test, bb_gt)
+    return 1.0 - np.sqrt(rho2 / c2)
+
+
+def mahalanobis_batch(bb_test, bb_gt, S):
+    """
+    Computes exp(-d^2 / 2) for the Mahalanobis distance d between the centres of the
+      bb_test bboxes and of the predicted bb_gt bboxes, under the [x,y] block of the
+      (M, 4, 4) innovation covariances S of the bb_gt tracks
+
+    Only the centres are compared: the area variance of the constant velocity model is
+      on a pixel scale, so the area term would swamp d^2 for any real box. An
+      iou_threshold t accepts d^2 <= -2 ln t; with 2 degrees of freedom 0.05 is the
+      95 % chi-square gate and 0.01 the 99 % one.
+    """
+    # (M, N, 2) differences so that each track's inverse covariance is one matmul
+    diff = (
+        convert_bboxes_to_z(bb_gt)[:, None, :2]
+        - convert_bboxes_to_z(bb_test)[None, :, :2]
+    )
+    d2 = np.einsum("mni,mni->nm", diff @ np.linalg.inv(S[:, :2, :2]), diff)
+    return np.exp(-0.5 * d2)
+
+
+# affinities selectable on Sort, higher is a better match; mahalanobis needs the
+# Kalman covariances and is bound to them by Sort.update
+AFFINITIES = {
+    "iou": iou_batch,
+    "giou": giou_batch,
+    "diou": diou_batch,
+    "center": center_batch,
+    "mahalanobis": mahalanobis_batch,
+}
+
+
+def iou_pairs(bb_test, bb_gt):
+    """
+    Computes IOU between the aligned rows of two (N, 4+) arrays of bboxes in the form
+      [x1,y1,x2,y2], i.e. the diagonal of iou_batch(bb_test, bb_gt)
+    """
+    xx1 = np.maximum(bb_test[:, 0], bb_gt[:, 0])
+    yy1 = np.maximum(bb_test[:, 1], bb_gt[:, 1])
+    xx2 = np.minimum(bb_test[:, 2], bb_gt[:, 2])
+    yy2 = np.minimum(bb_test[:, 3], bb_gt[:, 3])
+    w = np.maximum(0.0, xx2 - xx1)
+    h = np.maximum(0.0, yy2 - yy1)
+    wh = w * h
+    o = wh / (
+        (bb_test[:, 2] - bb_test[:, 0]) * (bb_test[:, 3] - bb_test[:, 1])
+        + (bb_gt[:, 2] - bb_gt[:, 0]) * (bb_gt[:, 3] - bb_gt[:, 1])
+        - wh
+    )
+    return o
+
+
+def overlap_candidates(bb_test, bb_gt):
+    """
+    Sort-and-sweep candidate index: returns the (i, j, iou) arrays of every pair
+      bb_test[i], bb_gt[j] with a positive IOU, without scoring the full N x M grid.
+
+    bb_gt is sorted once by x1; a pair can only overlap when bb_gt's x1 falls inside
+      (bb_test.x1 - widest bb_gt, bb_test.x2), so only that window is scored.
+    """
+    order = np.argsort(bb_gt[:, 0], kind="stable")
+    x1 = bb_gt[order, 0]
+    max_w = np.max(bb_gt[:, 2] - bb_gt[:, 0])
+    lo = np.searchsorted(x1, bb_test[:, 0] - max_w, side="right")
+    hi = np.searchsorted(x1, bb_test[:, 2], side="left")
+    counts = np.maximum(hi - lo, 0)
+    i = np.repeat(np.arange(len(bb_test)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    j = order[np.repeat(lo, counts) + offsets]
+    iou = iou_pairs(bb_test[i], bb_gt[j])
+    keep = iou > 0
+    return i[keep], j[keep], iou[keep]
+
+
+def sparse_linear_assignment(detections, trackers, iou_threshold=0.3):
+    """
+    Gated counterpart of the dense iou_batch + linear_assignment step.
+
+    Only overlapping pairs are scored. The bipartite overlap graph is split into
+      connected components and each one is solved on its own, which gives the same
+      assignment as the dense solve since pairs across components have zero IOU.
+
+    Returns the (K, 2) matched indices and their IOUs.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n_det, n_trk = len(detections), len(trackers)
+    i, j, iou = overlap_candidates(detections, trackers)
+
+    # same shortcut as the dense path: take the thresholded pairs when one-to-one
+    above = iou > iou_threshold
+    if not above.any():
+        return np.empty((0, 2), dtype=int), np.empty(0)
+    if (
+        np.bincount(i[above]).max() == 1
+        and np.bincount(j[above], minlength=n_trk).max() == 1
+    ):
+        return np.stack((i[above], j[above]), axis=1), iou[above]
+
+    graph = coo_matrix(
+        (np.ones(len(i)), (i, n_det + j)), shape=(n_det + n_trk, n_det + n_trk)
+    )
+    _, labels = connected_components(graph, directed=False)
+    edge_labels = labels[i]
+    det_count = np.bincount(labels[:n_det], minlength=labels.max() + 1)
+    trk_count = np.bincount(labels[n_det:], minlength=labels.max() + 1)
+
+    # components made of a single detection and a single tracker match directly
+    simple = (det_count[edge_labels] == 1) & (trk_count[edge_labels] == 1)
+    matches = [np.stack((i[simple], j[simple]), axis=1)]
+    ious = [iou[simple]]
+
+    order = np.argsort(edge_labels[~simple], kind="stable")
+    ci, cj, ciou = i[~simple][order], j[~simple][order], iou[~simple][order]
+    bounds = np.flatnonzero(np.diff(edge_labels[~simple][order])) + 1
+    for ei, ej, eiou in zip(
+        np.split(ci, bounds), np.split(cj, bounds), np.split(ciou, bounds)
+    ):
+        if len(ei) == 0:
+            continue
+        dets, di = np.unique(ei, return_inverse=True)
+        trks, ti = np.unique(ej, return_inverse=True)
+        sub = np.zeros((len(dets), len(trks)))
+        sub[di, ti] = eiou
+        local = linear_assignment(-sub).reshape(-1, 2).astype(int)
+        matches.append(np.stack((dets[local[:, 0]], trks[local[:, 1]]), axis=1))
+        ious.append(sub[local[:, 0], local[:, 1]])
+
+    return np.concatenate(matches), np.concatenate(ious)
+
+
 def convert_bbox_to_z(bbox):
     """
     Takes a bounding box in the form [x1,y1,x2,y2] and returns z in the form
@@ -103,20 +336,76 @@ def convert_x_to_bbox(x, score=None):
         ).reshape((1, 5))
 
 
+def kalman_predict(x, P, Q):
+    """
+    Constant velocity predict step of the [x,y,s,r,vx,vy,vs] state, for one (7,) state
+      or a stack of (N, 7) states with their (N, 7, 7) covariances
+
+    Computes F x and F P F' + Q by adding the velocity rows and columns to the
+    position ones instead of multiplying by the 7x7 F.
+    """
+    x = x.copy()
+    x[..., :3] += x[..., 4:7]
+    P = P.copy()
+    P[..., :3, :] += P[..., 4:7, :]
+    P[..., :, :3] += P[..., :, 4:7]
+    return x, P + Q
+
+
+def kalman_update(x, P, z, R):
+    """
+    Update step with a measurement z of the first four states, H = [I 0], for one
+      state or a stack of states as in kalman_predict
+
+    The gain is solved from the 4x4 innovation covariance S = P[:4,:4] + R without
+    inverting anything larger, and the covariance takes the standard P - K H P form
+    rather than the Joseph form.
+    """
+    PHT = P[..., :, :4]
+    S = P[..., :4, :4] + R
+    # K = P H' S^-1, with S symmetric
+    K = np.linalg.solve(S, np.swapaxes(PHT, -1, -2))
+    K = np.swapaxes(K, -1, -2)
+    y = z - x[..., :4]
+    x = x + (K @ y[..., None])[..., 0]
+    P = P - K @ P[..., :4, :]
+    return x, P
+
+
+def read_only(array):
+    """
+    Marks array as immutable so that it can be shared by all tracks
+    """
+    array.flags.writeable = False
+    return array
+
+
 class KalmanBoxTracker(object):
     """
     This class represents the internal state of individual tracked objects observed as bbox.
+
+    The constant velocity model matrices are shared, read-only class attributes and
+    the boxes predicted since the last update are kept in a ring buffer of the last
+    history_size predictions.
     """
 
-    count = 0
+    __slots__ = (
+        "x",
+        "P",
+        "time_since_update",
+        "id",
+        "hits",
+        "hit_streak",
+        "age",
+        "_history",
+        "_history_len",
+    )
 
-    def __init__(self, bbox):
-        """
-        Initialises a tracker using initial bounding box.
-        """
-        # define constant velocity model
-        self.kf = KalmanFilter(dim_x=7, dim_z=4)
-        self.kf.F = np.array(
+    history_size = 8
+
+    # define constant velocity model
+    F = read_only(
+        np.array(
             [
                 [1, 0, 0, 0, 1, 0, 0],
                 [0, 1, 0, 0, 0, 1, 0],
@@ -125,30 +414,27 @@ class KalmanBoxTracker(object):
                 [0, 0, 0, 0, 1, 0, 0],
                 [0, 0, 0, 0, 0, 1, 0],
                 [0, 0, 0, 0, 0, 0, 1],
-            ]
-        )
-        self.kf.H = np.array(
-            [
-                [1, 0, 0, 0, 0, 0, 0],
-                [0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 1, 0, 0, 0, 0],
-                [0, 0, 0, 1, 0, 0, 0],
-            ]
+            ],
+            dtype=float,
         )
+    )
+    H = read_only(np.eye(4, 7))
+    R = read_only(np.diag([1.0, 1.0, 10.0, 10.0]))
+    Q = read_only(np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001]))
+    # give high uncertainty to the unobservable initial velocities
+    P0 = read_only(np.diag([10.0, 10.0, 10.0, 10.0, 10000.0, 10000.0, 10000.0]))
 
-        self.kf.R[2:, 2:] *= 10.0
-        self.kf.P[
-            4:, 4:
-        ] *= 1000.0  # give high uncertainty to the unobservable initial velocities
-        self.kf.P *= 10.0
-        self.kf.Q[-1, -1] *= 0.01
-        self.kf.Q[4:, 4:] *= 0.01
-
-        self.kf.x[:4] = convert_bbox_to_z(bbox)
+    def __init__(self, bbox, track_id):
+        """
+        Initialises a tracker using initial bounding box and the id given by its Sort.
+        """
+        self.x = np.zeros(7)
+        self.x[:4] = convert_bbox_to_z(bbox)[:, 0]
+        self.P = self.P0.copy()
         self.time_since_update = 0
-        self.id = KalmanBoxTracker.count
-        KalmanBoxTracker.count += 1
-        self.history = []
+        self.id = track_id
+        self._history = None
+        self._history_len = 0
         self.hits = 0
         self.hit_streak = 0
         self.age = 0
@@ -158,91 +444,316 @@ class KalmanBoxTracker(object):
         Updates the state vector with observed bbox.
         """
         self.time_since_update = 0
-        self.history = []
+        self._history_len = 0
         self.hits += 1
         self.hit_streak += 1
-        self.kf.update(convert_bbox_to_z(bbox))
+        self.x, self.P = kalman_update(
+            self.x, self.P, convert_bbox_to_z(bbox)[:, 0], self.R
+        )
 
-    def predict(self):
+    def predict(self, observed=True):
         """
         Advances the state vector and returns the predicted bounding box estimate.
+
+        With observed=False the frame had no detector pass, so the age, hit streak and
+        time since update are left as they are.
+        """
+        if (self.x[6] + self.x[2]) <= 0:
+            self.x[6] *= 0.0
+        self.x, self.P = kalman_predict(self.x, self.P, self.Q)
+        if observed:
+            self.age += 1
+            if self.time_since_update > 0:
+                self.hit_streak = 0
+            self.time_since_update += 1
+        box = convert_x_to_bbox(self.x)
+        if self._history is None:
+            self._history = np.empty((self.history_size, 4))
+        self._history[self._history_len % self.history_size] = box[0]
+        self._history_len += 1
+        return box
+
+    @property
+    def history(self):
         """
-        if (self.kf.x[6] + self.kf.x[2]) <= 0:
-            self.kf.x[6] *= 0.0
-        self.kf.predict()
-        self.age += 1
-        if self.time_since_update > 0:
-            self.hit_streak = 0
-        self.time_since_update += 1
-        self.history.append(convert_x_to_bbox(self.kf.x))
-        return self.history[-1]
+        Returns the (K, 4) boxes predicted since the last update, oldest first, at
+          most history_size of them
+        """
+        n = min(self._history_len, self.history_size)
+        if n == 0:
+            return np.empty((0, 4))
+        rows = np.arange(self._history_len - n, self._history_len) % self.history_size
+        return self._history[rows]
 
     def get_state(self):
         """
         Returns the current bounding box estimate.
         """
-        return convert_x_to_bbox(self.kf.x)
+        return convert_x_to_bbox(self.x)
+
+    @classmethod
+    def from_state(cls, x, P, track_id, time_since_update, hits, hit_streak, age):
+        """
+        Recreates a tracker from its (7,) state, covariance and counters, with an
+          empty history
+        """
+        trk = cls.__new__(cls)
+        trk.x = np.array(x, dtype=float).reshape(7)
+        trk.P = np.array(P, dtype=float)
+        trk.id = int(track_id)
+        trk.time_since_update = int(time_since_update)
+        trk.hits = int(hits)
+        trk.hit_streak = int(hit_streak)
+        trk.age = int(age)
+        trk._history = None
+        trk._history_len = 0
+        return trk
+
+
+def convert_bboxes_to_z(bboxes):
+    """
+    Batched form of convert_bbox_to_z: takes an (N, 4+) array of [x1,y1,x2,y2] boxes
+      and returns an (N, 4) array of [x,y,s,r] measurements
+    """
+    w = bboxes[:, 2] - bboxes[:, 0]
+    h = bboxes[:, 3] - bboxes[:, 1]
+    return np.stack(
+        (bboxes[:, 0] + w / 2.0, bboxes[:, 1] + h / 2.0, w * h, w / h), axis=1
+    )
+
+
+def convert_xs_to_bboxes(xs):
+    """
+    Batched form of convert_x_to_bbox: takes an (N, 4+) array of [x,y,s,r,...] states
+      and returns an (N, 4) array of [x1,y1,x2,y2] boxes
+    """
+    w = np.sqrt(xs[:, 2] * xs[:, 3])
+    h = xs[:, 2] / w
+    return np.stack(
+        (
+            xs[:, 0] - w / 2.0,
+            xs[:, 1] - h / 2.0,
+            xs[:, 0] + w / 2.0,
+            xs[:, 1] + h / 2.0,
+        ),
+        axis=1,
+    )
+
+
+def predict_bboxes(xs, steps=1):
+    """
+    Takes an (N, 7) array of Kalman states and returns the (K, 4) [x1,y1,x2,y2] boxes
+      where the constant velocity model puts them steps frames ahead, leaving out
+      states that collapse to an empty box
+    """
+    xs = np.array(xs)
+    xs[:, :3] += steps * xs[:, 4:7]
+    xs = xs[(xs[:, 2] > 0) & (xs[:, 3] > 0)]
+    return convert_xs_to_bboxes(xs)
+
+
+class KalmanBoxTrackerBank(object):
+    """
+    Structure-of-arrays counterpart of a list of KalmanBoxTracker objects.
+
+    Every track's 7-dim state and 7x7 covariance live in stacked arrays so that predict
+    and update run as one batched matrix operation for all tracks. The model matrices
+    are shared with KalmanBoxTracker.
+    """
+
+    FIELDS = ("x", "P", "id", "time_since_update", "hits", "hit_streak", "age")
+
+    F = KalmanBoxTracker.F
+    H = KalmanBoxTracker.H
+    R = KalmanBoxTracker.R
+    Q = KalmanBoxTracker.Q
+    P0 = KalmanBoxTracker.P0
+
+    def __init__(self):
+        """
+        Creates an empty bank.
+        """
+        self.x = np.empty((0, 7))
+        self.P = np.empty((0, 7, 7))
+        self.id = np.empty(0, dtype=int)
+        self.time_since_update = np.empty(0, dtype=int)
+        self.hits = np.empty(0, dtype=int)
+        self.hit_streak = np.empty(0, dtype=int)
+        self.age = np.empty(0, dtype=int)
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, bboxes, ids):
+        """
+        Initialises one track per row of bboxes with the given ids.
+        """
+        n = len(bboxes)
+        if n == 0:
+            return
+        x = np.zeros((n, 7))
+        x[:, :4] = convert_bboxes_to_z(bboxes)
+        zeros = np.zeros(n, dtype=int)
+        self.x = np.concatenate((self.x, x))
+        self.P = np.concatenate((self.P, np.broadcast_to(self.P0, (n, 7, 7))))
+        self.id = np.concatenate((self.id, ids))
+        self.time_since_update = np.concatenate((self.time_since_update, zeros))
+        self.hits = np.concatenate((self.hits, zeros))
+        self.hit_streak = np.concatenate((self.hit_streak, zeros))
+        self.age = np.concatenate((self.age, zeros))
 
+    def keep(self, mask):
+        """
+        Drops every track whose entry in the boolean mask is False.
+        """
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+        self.id = self.id[mask]
+        self.time_since_update = self.time_since_update[mask]
+        self.hits = self.hits[mask]
+        self.hit_streak = self.hit_streak[mask]
+        self.age = self.age[mask]
+
+    def predict(self, observed=True):
+        """
+        Advances all state vectors and returns the (N, 4) predicted bounding boxes.
+
+        observed has the same meaning as in KalmanBoxTracker.predict.
+        """
+        self.x[self.x[:, 6] + self.x[:, 2] <= 0, 6] = 0.0
+        self.x, self.P = kalman_predict(self.x, self.P, self.Q)
+        if observed:
+            self.age += 1
+            self.hit_streak[self.time_since_update > 0] = 0
+            self.time_since_update += 1
+        return convert_xs_to_bboxes(self.x)
+
+    def update(self, indices, bboxes):
+        """
+        Updates the tracks at indices with the observed bboxes, one row per index.
+        """
+        if len(indices) == 0:
+            return
+        x, P = kalman_update(
+            self.x[indices], self.P[indices], convert_bboxes_to_z(bboxes), self.R
+        )
+        self.x[indices] = x
+        self.P[indices] = P
+        self.time_since_update[indices] = 0
+        self.hits[indices] += 1
+        self.hit_streak[indices] += 1
 
-def associate_detections_to_trackers(detections, trackers, iou_threshold=0.3):
+    def get_state(self):
+        """
+        Returns the (N, 4) current bounding box estimates.
+        """
+        return convert_xs_to_bboxes(self.x)
+
+
+def associate_detections_to_trackers(
+    detections,
+    trackers,
+    iou_threshold=0.3,
+    sparse=None,
+    profiler=None,
+    affinity=iou_batch,
+):
     """
     Assigns detections to tracked object (both represented as bounding boxes)
 
+    affinity scores every detection against every tracker, see AFFINITIES, and
+      iou_threshold is the lowest score of a match.
+    sparse selects the gated sparse_linear_assignment instead of the dense IOU matrix;
+      by default it is used with iou_batch and a positive iou_threshold once
+      detections x trackers reaches SPARSE_MIN_PAIRS. Other affinities, and
+      thresholds that accept pairs which do not overlap, take the dense path.
+    profiler is an optional phase_timing.PhaseProfiler that gets the "iou", "assignment"
+      and "matching" phases, or a single "sparse" phase for the sparse solver.
+
     Returns 3 lists of matches, unmatched_detections and unmatched_trackers
     """
     if len(trackers) == 0 or len(detections) == 0:
         return (
             np.empty((0, 2), dtype=int),
             np.arange(len(detections)),
-            np.empty((0, 5), dtype=int),
+            np.arange(len(trackers)),
         )
 
-    iou_matrix = iou_batch(detections, trackers)
-
-    if min(iou_matrix.shape) > 0:
-        a = (iou_matrix > iou_threshold).astype(np.int32)
-        if a.sum(1).max() == 1 and a.sum(0).max() == 1:
-            matched_indices = np.stack(np.where(a), axis=1)
-        else:
-            matched_indices = linear_assignment(-iou_matrix)
+    if sparse is None:
+        sparse = (
+            affinity is iou_batch
+            and iou_threshold > 0
+            and len(detections) * len(trackers) >= SPARSE_MIN_PAIRS
+        )
+    if sparse:
+        matched_indices, matched_iou = sparse_linear_assignment(
+            detections, trackers, iou_threshold
+        )
+        if profiler is not None:
+            profiler.lap("sparse")
     else:
-        matched_indices = np.empty(shape=(0, 2))
+        iou_matrix = affinity(detections, trackers)
+        if profiler is not None:
+            profiler.lap("iou")
 
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if d not in matched_indices[:, 0]:
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if t not in matched_indices[:, 1]:
-            unmatched_trackers.append(t)
+        if min(iou_matrix.shape) > 0:
+            a = (iou_matrix > iou_threshold).astype(np.int32)
+            if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+                matched_indices = np.stack(np.where(a), axis=1)
+            else:
+                matched_indices = linear_assignment(-iou_matrix).reshape(-1, 2)
+        else:
+            matched_indices = np.empty(shape=(0, 2), dtype=int)
+        matched_iou = iou_matrix[matched_indices[:, 0], matched_indices[:, 1]]
+        if profiler is not None:
+            profiler.lap("assignment")
 
     # filter out matched with low IOU
-    matches = []
-    for m in matched_indices:
-        if iou_matrix[m[0], m[1]] < iou_threshold:
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1, 2))
-    if len(matches) == 0:
-        matches = np.empty((0, 2), dtype=int)
-    else:
-        matches = np.concatenate(matches, axis=0)
+    matches = matched_indices[matched_iou >= iou_threshold].astype(int)
+
+    unmatched = np.ones(len(detections), dtype=bool)
+    unmatched[matches[:, 0]] = False
+    unmatched_detections = np.flatnonzero(unmatched)
+    unmatched = np.ones(len(trackers), dtype=bool)
+    unmatched[matches[:, 1]] = False
+    unmatched_trackers = np.flatnonzero(unmatched)
+    if profiler is not None:
+        profiler.lap("matching")
 
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+    return matches, unmatched_detections, unmatched_trackers
 
 
 class Sort(object):
-    def __init__(self, max_age=30, min_hits=3, iou_threshold=0.3):
+    def __init__(
+        self,
+        max_age=30,
+        min_hits=3,
+        iou_threshold=0.3,
+        batched=True,
+        profiler=None,
+        affinity="iou",
+    ):
         """
         Sets key parameters for SORT
+
+        With batched=True all tracks are held in a KalmanBoxTrackerBank; otherwise one
+        KalmanBoxTracker object is kept per track. A phase_timing.PhaseProfiler passed as
+        profiler records the duration of every phase of update. affinity names the
+        AFFINITIES entry used to match detections, iou_threshold then being the lowest
+        affinity of a match.
         """
+        if affinity not in AFFINITIES:
+            raise ValueError("Unknown affinity %r" % affinity)
         self.max_age = max_age
         self.min_hits = min_hits
         self.iou_threshold = iou_threshold
-        self.trackers = []
+        self.affinity = affinity
+        self.batched = batched
+        self.profiler = profiler
+        self.trackers = KalmanBoxTrackerBank() if batched else []
         self.frame_count = 0
+        self.update_count = 0
+        self.next_id = 0
 
     def update(self, dets=np.empty((0, 5))):
         """
@@ -253,47 +764,348 @@ class Sort(object):
 
         NOTE: The number of objects returned may differ from the number of detections provided.
         """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start()
         self.frame_count += 1
+        self.update_count += 1
         # get predicted locations from existing trackers.
-        trks = np.zeros((len(self.trackers), 5))
-        to_del = []
-        ret = []
-        for t, trk in enumerate(trks):
-            pos = self.trackers[t].predict()[0]
-            trk[:] = [pos[0], pos[1], pos[2], pos[3], 0]
-            if np.any(np.isnan(pos)):
-                to_del.append(t)
-        trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
-        for t in reversed(to_del):
-            self.trackers.pop(t)
+        trks = self._predict(observed=True)
+        if profiler is not None:
+            profiler.lap("predict")
+        affinity = AFFINITIES[self.affinity]
+        if affinity is mahalanobis_batch:
+            affinity = partial(mahalanobis_batch, S=self._innovations())
         matched, unmatched_dets, unmatched_trks = associate_detections_to_trackers(
-            dets, trks, self.iou_threshold
+            dets, trks, self.iou_threshold, profiler=profiler, affinity=affinity
         )
 
         # update matched trackers with assigned detections
-        for m in matched:
-            self.trackers[m[1]].update(dets[m[0], :])
+        if len(matched) > 0:
+            self._correct(matched[:, 1], dets[matched[:, 0], :])
+        if profiler is not None:
+            profiler.lap("correct")
 
         # create and initialise new trackers for unmatched detections
-        for i in unmatched_dets:
-            trk = KalmanBoxTracker(dets[i, :])
-            self.trackers.append(trk)
-        i = len(self.trackers)
-        for trk in reversed(self.trackers):
-            d = trk.get_state()[0]
-            if (trk.time_since_update < 1) and (
-                trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits
-            ):
-                ret.append(
-                    np.concatenate((d, [trk.id + 1])).reshape(1, -1)
-                )  # +1 as MOT benchmark requires positive
-            i -= 1
-            # remove dead tracklet
-            if trk.time_since_update > self.max_age:
-                self.trackers.pop(i)
-        if len(ret) > 0:
-            return np.concatenate(ret)
-        return np.empty((0, 5))
+        if len(unmatched_dets) > 0:
+            self._spawn(dets[unmatched_dets, :])
+
+        boxes, ids, time_since_update, hit_streak = self._states()
+        ret = self._output(boxes, ids, time_since_update, hit_streak)
+
+        # remove dead tracklets
+        alive = time_since_update <= self.max_age
+        if not alive.all():
+            self._keep(alive)
+        if profiler is not None:
+            profiler.lap("bookkeeping")
+            profiler.stop("update")
+        return ret
+
+    def predict(self):
+        """
+        Advances every track by one frame on which the detector did not run.
+
+        The tracks are not penalised for the missing detections: ages, hit streaks and
+        max_age only count the frames passed to update. Returns the predicted boxes of
+        the tracks that update would have returned on the last detection frame, in the
+        same format as update.
+        """
+        self.frame_count += 1
+        self._predict(observed=False)
+        return self._output(*self._states())
+
+    def get_states(self):
+        """
+        Returns the (N, 7) Kalman states [x,y,s,r,vx,vy,vs] of all tracks.
+        """
+        if self.batched:
+            return self.trackers.x
+        return np.array([trk.x for trk in self.trackers]).reshape(-1, 7)
+
+    def get_predictions(self, steps=1):
+        """
+        Returns the (N, 4) [x1,y1,x2,y2] boxes where the constant velocity model puts
+          every track steps frames ahead, without advancing the tracks.
+        """
+        return predict_bboxes(self.get_states(), steps)
+
+    def snapshot(self):
+        """
+        Returns the parameters, counters and tracks as bytes for Sort.restore.
+
+        The tracks are saved as the KalmanBoxTrackerBank arrays in an uncompressed .npz
+        whichever engine holds them, so a snapshot restores in one copy per array.
+        """
+        if self.batched:
+            arrays = {f: getattr(self.trackers, f) for f in KalmanBoxTrackerBank.FIELDS}
+        else:
+            arrays = {
+                "x": np.array([trk.x for trk in self.trackers]).reshape(-1, 7),
+                "P": np.array([trk.P for trk in self.trackers]).reshape(-1, 7, 7),
+            }
+            for f in KalmanBoxTrackerBank.FIELDS[2:]:
+                arrays[f] = np.array(
+                    [getattr(trk, f) for trk in self.trackers], dtype=int
+                )
+        out = BytesIO()
+        np.savez(
+            out,
+            max_age=self.max_age,
+            min_hits=self.min_hits,
+            iou_threshold=self.iou_threshold,
+            affinity=self.affinity,
+            batched=self.batched,
+            frame_count=self.frame_count,
+            update_count=self.update_count,
+            next_id=self.next_id,
+            **arrays
+        )
+        return out.getvalue()
+
+    @classmethod
+    def restore(cls, data, batched=None):
+        """
+        Recreates a Sort from bytes returned by Sort.snapshot, with the engine it was
+          saved with unless batched is given
+        """
+        with np.load(BytesIO(data), allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        if batched is None:
+            batched = bool(arrays["batched"])
+        tracker = cls(
+            int(arrays["max_age"]),
+            int(arrays["min_hits"]),
+            float(arrays["iou_threshold"]),
+            batched,
+            affinity=str(arrays["affinity"]),
+        )
+        tracker.frame_count = int(arrays["frame_count"])
+        tracker.update_count = int(arrays.get("update_count", arrays["frame_count"]))
+        tracker.next_id = int(arrays["next_id"])
+        fields = [arrays[f] for f in KalmanBoxTrackerBank.FIELDS]
+        if batched:
+            for f, array in zip(KalmanBoxTrackerBank.FIELDS, fields):
+                setattr(tracker.trackers, f, array)
+        else:
+            tracker.trackers = [
+                KalmanBoxTracker.from_state(*row) for row in zip(*fields)
+            ]
+        return tracker
+
+    def _predict(self, observed):
+        """
+        Predicts all tracks, drops the ones that became invalid and returns the
+        (N, 4) predicted boxes of the others.
+        """
+        if self.batched:
+            trks = self.trackers.predict(observed)
+        else:
+            trks = np.empty((len(self.trackers), 4))
+            for t, trk in enumerate(self.trackers):
+                trks[t] = trk.predict(observed)[0]
+        valid = ~np.any(np.isnan(trks), axis=1)
+        if not valid.all():
+            self._keep(valid)
+            trks = trks[valid]
+        return trks
+
+    def _innovations(self):
+        """
+        Returns the (N, 4, 4) innovation covariances H P H' + R of all tracks.
+        """
+        if self.batched:
+            P = self.trackers.P
+        else:
+            P = np.array([trk.P for trk in self.trackers]).reshape(-1, 7, 7)
+        return P[:, :4, :4] + KalmanBoxTracker.R
+
+    def _correct(self, indices, dets):
+        """
+        Updates the tracks at indices with one detection each.
+        """
+        if self.batched:
+            self.trackers.update(indices, dets)
+        else:
+            for t, det in zip(indices, dets):
+                self.trackers[t].update(det)
+
+    def _spawn(self, dets):
+        """
+        Starts one track per detection.
+        """
+        ids = np.arange(self.next_id, self.next_id + len(dets))
+        self.next_id += len(dets)
+        if self.batched:
+            self.trackers.add(dets, ids)
+        else:
+            self.trackers.extend(
+                KalmanBoxTracker(det, int(i)) for det, i in zip(dets, ids)
+            )
+
+    def _keep(self, mask):
+        """
+        Drops the tracks whose entry in the boolean mask is False.
+        """
+        if self.batched:
+            self.trackers.keep(mask)
+        else:
+            self.trackers = [trk for trk, k in zip(self.trackers, mask) if k]
+
+    def _states(self):
+        """
+        Returns the boxes, ids, time since update and hit streak of all tracks.
+        """
+        if self.batched:
+            bank = self.trackers
+            return bank.get_state(), bank.id, bank.time_since_update, bank.hit_streak
+        n = len(self.trackers)
+        boxes = np.empty((n, 4))
+        for t, trk in enumerate(self.trackers):
+            boxes[t] = trk.get_state()[0]
+        ids = np.fromiter((trk.id for trk in self.trackers), dtype=int, count=n)
+        time_since_update = np.fromiter(
+            (trk.time_since_update for trk in self.trackers), dtype=int, count=n
+        )
+        hit_streak = np.fromiter(
+            (trk.hit_streak for trk in self.trackers), dtype=int, count=n
+        )
+        return boxes, ids, time_since_update, hit_streak
+
+    def _output(self, boxes, ids, time_since_update, hit_streak):
+        """
+        Assembles the [x1,y1,x2,y2,id] rows of the confirmed tracks, newest first.
+
+        The min_hits warm-up counts detection frames, like hit_streak, so frames
+          skipped with predict do not end it early.
+        """
+        confirmed = (time_since_update < 1) & (
+            (hit_streak >= self.min_hits) | (self.update_count <= self.min_hits)
+        )
+        rows = np.flatnonzero(confirmed)[::-1]
+        ret = np.empty((len(rows), 5))
+        ret[:, :4] = boxes[rows]
+        ret[:, 4] = ids[rows] + 1  # +1 as MOT benchmark requires positive
+        return ret
+
+
+def track_sequence(seq_dets_fn, seq, args, display=None, out_dir="output"):
+    """
+    Runs one SORT instance over a MOT det.txt file and writes <out_dir>/<seq>.txt
+
+    display is the (fig, ax, colours) tuple used by --display, or None.
+    Returns the sequence name, its number of frames, the time spent tracking and the
+    PhaseProfiler of the run with --profile, otherwise None.
+    """
+    # ids restart per sequence so the output does not depend on worker scheduling
+    mot_tracker = Sort(
+        max_age=args.max_age,
+        min_hits=args.min_hits,
+        iou_threshold=args.iou_threshold,
+        affinity=args.affinity,
+        profiler=PhaseProfiler(PHASES) if args.profile else None,
+    )  # create instance of the SORT tracker
+    seq_dets = load_detections(seq_dets_fn, cache=args.cache)
+    if display:
+        plt, patches, io = load_display()
+    total_time = 0.0
+    total_frames = 0
+
+    out_fn = os.path.join(out_dir, "%s.%s" % (seq, args.output_format))
+    with MOTResultWriter(out_fn, binary=args.output_format == "npy") as out_file:
+        print("Processing %s." % (seq))
+        for frame, dets in iter_frames(seq_dets):
+            total_frames += 1
+
+            if display:
+                fig, ax1, colours = display
+                fn = os.path.join(
+                    "mot_benchmark", args.phase, seq, "img1", "%06d.jpg" % (frame)
+                )
+                im = io.imread(fn)
+                ax1.imshow(im)
+                plt.title(seq + " Tracked Targets")
+
+            start_time = time.time()
+            trackers = mot_tracker.update(dets)
+            cycle_time = time.time() - start_time
+            total_time += cycle_time
+
+            out_file.write(frame, trackers)
+
+            if display:
+                for d in trackers:
+                    d = d.astype(np.int32)
+                    ax1.add_patch(
+                        patches.Rectangle(
+                            (d[0], d[1]),
+                            d[2] - d[0],
+                            d[3] - d[1],
+                            fill=False,
+                            lw=3,
+                            ec=colours[d[4] % 32, :],
+                        )
+                    )
+
+            if display:
+                fig.canvas.flush_events()
+                plt.draw()
+                ax1.cla()
+
+    return seq, total_frames, total_time, mot_tracker.profiler
+
+
+def sweep(args, seq_dets_fns, seqs):
+    """
+    Tracks every sequence once per (max_age, min_hits, iou_threshold) combination
+
+    Detections are parsed once into their det.npy cache, which all runs then share.
+    Each run writes output/sweep/<config>/<seq>.txt and args.table gets one row of
+    throughput per configuration.
+    """
+    for seq_dets_fn in seq_dets_fns:
+        load_detections(seq_dets_fn, cache=True)
+    configs = list(
+        itertools.product(args.max_ages, args.min_hits_values, args.iou_thresholds)
+    )
+    tasks = []
+    for max_age, min_hits, iou_threshold in configs:
+        run_args = argparse.Namespace(**vars(args))
+        run_args.max_age = max_age
+        run_args.min_hits = min_hits
+        run_args.iou_threshold = iou_threshold
+        run_args.cache = True
+        out_dir = os.path.join(
+            "output", "sweep", "age%d_hits%d_iou%g" % (max_age, min_hits, iou_threshold)
+        )
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+        for seq_dets_fn, seq in zip(seq_dets_fns, seqs):
+            tasks.append((seq_dets_fn, seq, run_args, None, out_dir))
+
+    print("Sweeping %d configurations over %d sequences." % (len(configs), len(seqs)))
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(track_sequence, *zip(*tasks)))
+    else:
+        results = [track_sequence(*task) for task in tasks]
+
+    with open(args.table, "w", newline="") as table_file:
+        table = csv.writer(table_file)
+        table.writerow(
+            ["max_age", "min_hits", "iou_threshold", "frames", "seconds", "fps"]
+        )
+        for c, (max_age, min_hits, iou_threshold) in enumerate(configs):
+            config_results = results[c * len(seqs) : (c + 1) * len(seqs)]
+            frames = sum(r[1] for r in config_results)
+            seconds = sum(r[2] for r in config_results)
+            fps = frames / seconds if seconds > 0 else float("inf")
+            table.writerow([max_age, min_hits, iou_threshold, frames, seconds, fps])
+            print(
+                "max_age=%d min_hits=%d iou_threshold=%g: %d frames or %.1f FPS"
+                % (max_age, min_hits, iou_threshold, frames, fps)
+            )
+    print("Wrote %s." % args.table)
 
 
 def parse_args():
@@ -326,6 +1138,71 @@ def parse_args():
     parser.add_argument(
         "--iou_threshold", help="Minimum IOU for match.", type=float, default=0.3
     )
+    parser.add_argument(
+        "--affinity",
+        help="Score matching detections to tracks, --iou_threshold being its minimum.",
+        choices=list(AFFINITIES),
+        default="iou",
+    )
+    parser.add_argument(
+        "--no_cache",
+        dest="cache",
+        help="Parse det.txt again instead of reusing its det.npy cache [False]",
+        action="store_false",
+    )
+    parser.add_argument(
+        "--output_format",
+        help="Tracker output as MOT text or float64 .npy rows.",
+        choices=["txt", "npy"],
+        default="txt",
+    )
+    parser.add_argument(
+        "--workers",
+        help="Number of sequences tracked in parallel processes.",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--profile",
+        help="Time every phase of Sort.update and write their percentiles per "
+        "sequence to this CSV file.",
+        type=str,
+        default=None,
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    sweep_parser = subparsers.add_parser(
+        "sweep", help="Track every sequence once per parameter combination."
+    )
+    sweep_parser.add_argument(
+        "--max_age",
+        dest="max_ages",
+        help="max_age values to sweep.",
+        type=int,
+        nargs="+",
+        default=[1, 3, 5],
+    )
+    sweep_parser.add_argument(
+        "--min_hits",
+        dest="min_hits_values",
+        help="min_hits values to sweep.",
+        type=int,
+        nargs="+",
+        default=[1, 3, 5],
+    )
+    sweep_parser.add_argument(
+        "--iou_threshold",
+        dest="iou_thresholds",
+        help="iou_threshold values to sweep.",
+        type=float,
+        nargs="+",
+        default=[0.2, 0.3, 0.4],
+    )
+    sweep_parser.add_argument(
+        "--table",
+        help="CSV file for the per-configuration results.",
+        type=str,
+        default=os.path.join("output", "sweep.csv"),
+    )
     args = parser.parse_args()
     return args
 
@@ -337,13 +1214,17 @@ if __name__ == "__main__":
     phase = args.phase
     total_time = 0.0
     total_frames = 0
-    colours = np.random.rand(32, 3)  # used only for display
+    colours = np.random.RandomState(0).rand(32, 3)  # used only for display
     if display:
         if not os.path.exists("mot_benchmark"):
             print(
                 "\n\tERROR: mot_benchmark link not found!\n\n    Create a symbolic link to the MOT benchmark\n    (https://motchallenge.net/data/2D_MOT_2015/#download). E.g.:\n\n    $ ln -s /path/to/MOT2015_challenge/2DMOT2015 mot_benchmark\n\n"
             )
             exit()
+        if args.workers > 1:
+            print("\n\tERROR: --display needs a single worker (--workers 1).\n")
+            exit()
+        plt, _, _ = load_display()
         plt.ion()
         fig = plt.figure()
         ax1 = fig.add_subplot(111, aspect="equal")
@@ -351,64 +1232,60 @@ if __name__ == "__main__":
     if not os.path.exists("output"):
         os.makedirs("output")
     pattern = os.path.join(args.seq_path, phase, "*", "det", "det.txt")
-    for seq_dets_fn in glob.glob(pattern):
-        mot_tracker = Sort(
-            max_age=args.max_age,
-            min_hits=args.min_hits,
-            iou_threshold=args.iou_threshold,
-        )  # create instance of the SORT tracker
-        seq_dets = np.loadtxt(seq_dets_fn, delimiter=",")
-        seq = seq_dets_fn[pattern.find("*") :].split(os.path.sep)[0]
-
-        with open(os.path.join("output", "%s.txt" % (seq)), "w") as out_file:
-            print("Processing %s." % (seq))
-            for frame in range(int(seq_dets[:, 0].max())):
-                frame += 1  # detection and frame numbers begin at 1
-                dets = seq_dets[seq_dets[:, 0] == frame, 2:7]
-                dets[:, 2:4] += dets[:, 0:2]  # convert to [x1,y1,w,h] to [x1,y1,x2,y2]
-                total_frames += 1
-
-                if display:
-                    fn = os.path.join(
-                        "mot_benchmark", phase, seq, "img1", "%06d.jpg" % (frame)
-                    )
-                    im = io.imread(fn)
-                    ax1.imshow(im)
-                    plt.title(seq + " Tracked Targets")
-
-                start_time = time.time()
-                trackers = mot_tracker.update(dets)
-                cycle_time = time.time() - start_time
-                total_time += cycle_time
+    seq_dets_fns = sorted(glob.glob(pattern))
+    seqs = [fn[pattern.find("*") :].split(os.path.sep)[0] for fn in seq_dets_fns]
 
-                for d in trackers:
-                    print(
-                        "%d,%d,%.2f,%.2f,%.2f,%.2f,1,-1,-1,-1"
-                        % (frame, d[4], d[0], d[1], d[2] - d[0], d[3] - d[1]),
-                        file=out_file,
-                    )
-                    if display:
-                        d = d.astype(np.int32)
-                        ax1.add_patch(
-                            patches.Rectangle(
-                                (d[0], d[1]),
-                                d[2] - d[0],
-                                d[3] - d[1],
-                                fill=False,
-                                lw=3,
-                                ec=colours[d[4] % 32, :],
-                            )
-                        )
+    if args.command == "sweep":
+        sweep(args, seq_dets_fns, seqs)
+        exit()
 
-                if display:
-                    fig.canvas.flush_events()
-                    plt.draw()
-                    ax1.cla()
+    wall_start = time.time()
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers)
+        results = pool.map(track_sequence, seq_dets_fns, seqs, repeat(args))
+    else:
+        pool = None
+        results = (
+            track_sequence(fn, seq, args, (fig, ax1, colours) if display else None)
+            for fn, seq in zip(seq_dets_fns, seqs)
+        )
+    profiles = []
+    for seq, seq_frames, seq_time, profiler in results:
+        print(
+            "%s: %.3f seconds for %d frames or %.1f FPS"
+            % (seq, seq_time, seq_frames, seq_frames / seq_time)
+        )
+        if profiler is not None:
+            print(profiler.report(seq))
+            profiles.append((seq, profiler))
+        total_time += seq_time
+        total_frames += seq_frames
+    if pool is not None:
+        pool.shutdown()
+    wall_time = time.time() - wall_start
 
     print(
         "Total Tracking took: %.3f seconds for %d frames or %.1f FPS"
         % (total_time, total_frames, total_frames / total_time)
     )
+    print(
+        "Wall clock with %d worker(s): %.3f seconds or %.1f FPS"
+        % (args.workers, wall_time, total_frames / wall_time)
+    )
+
+    if args.profile:
+        with open(args.profile, "w", newline="") as profile_file:
+            table = csv.writer(profile_file)
+            table.writerow(
+                ["seq", "phase", "calls", "mean_us", "p50_us", "p95_us", "p99_us"]
+            )
+            for seq, profiler in profiles:
+                for phase, row in profiler.summary().items():
+                    table.writerow(
+                        [seq, phase, row["count"]]
+                        + [row[k] / 1e3 for k in ("mean", "p50", "p95", "p99")]
+                    )
+        print("Wrote %s." % args.profile)
 
     if display:
         print("Note: to get real runtime results run without the option: --display")